@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files written by benchmarks.run.
+
+    python -m benchmarks.compare baseline.json candidate.json --fail-over 10
+
+Exits non-zero when any tracked metric regresses by more than --fail-over
+percent (throughput down, or latency / memory up).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# (metric path, higher_is_better)
+_QUERY_METRICS = [("p50_ms", False), ("p90_ms", False), ("p99_ms", False), ("mean_ms", False)]
+_INGEST_METRICS = [("pages_per_s", True), ("chunks_per_s", True), ("embeddings_per_s", True)]
+
+
+def _rows(base: Dict, cand: Dict) -> List[Tuple[str, float, float, bool]]:
+    rows = []
+
+    base_ingest = {run["files"]: run for run in base.get("ingestion", [])}
+    for run in cand.get("ingestion", []):
+        old = base_ingest.get(run["files"])
+        if not old:
+            continue
+        for metric, higher in _INGEST_METRICS:
+            rows.append((f"ingest[{run['files']}].{metric}", old[metric], run[metric], higher))
+
+    for metric, higher in _QUERY_METRICS:
+        if metric in base.get("query", {}) and metric in cand.get("query", {}):
+            rows.append((f"query.{metric}", base["query"][metric], cand["query"][metric], higher))
+
+    if "batch" in base and "batch" in cand:
+        rows.append(("batch.queries_per_s", base["batch"]["queries_per_s"], cand["batch"]["queries_per_s"], True))
+
+    if "peak_rss_mb" in base and "peak_rss_mb" in cand:
+        rows.append(("peak_rss_mb", base["peak_rss_mb"], cand["peak_rss_mb"], False))
+
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--fail-over", type=float, default=None, help="max allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))
+    cand = json.loads(args.candidate.read_text(encoding="utf-8"))
+
+    print(f"{'metric':36} {base['meta']['commit']:>12} {cand['meta']['commit']:>12} {'change':>9}")
+    regressed = False
+
+    for name, old, new, higher_is_better in _rows(base, cand):
+        change = ((new - old) / old * 100) if old else 0.0
+        regression = -change if higher_is_better else change
+        flag = ""
+        if args.fail_over is not None and regression > args.fail_over:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:36} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{flag}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
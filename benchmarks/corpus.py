@@ -0,0 +1,69 @@
+"""Synthetic policy-handbook corpora of configurable size."""
+import random
+from pathlib import Path
+from typing import List
+
+_TOPICS = [
+    "Family and Medical Leave", "Sick Leave", "Vacation", "Holidays", "Jury Duty",
+    "Voting", "Dress Code", "Payday", "Personnel Files", "Equal Opportunity",
+    "Non-Harassment", "Drug-Free Workplace", "Company Property", "Overtime",
+    "Disciplinary Action", "Termination", "Emergency Safety", "Remote Work",
+]
+
+_SENTENCES = [
+    "Employees who have worked at least 1,250 hours during the previous twelve months are eligible.",
+    "Requests must be submitted to a supervisor in writing at least two weeks in advance.",
+    "Employment with the company is at-will and may be terminated at any time.",
+    "This policy does not create a contract and may be revised at the company's discretion.",
+    "Unused days do not carry over to the next calendar year unless required by law.",
+    "Employees should have no expectation of privacy when using company equipment.",
+    "Retaliation against anyone reporting a concern in good faith is strictly prohibited.",
+    "Questions about this section should be directed to Human Resources.",
+    "Part-time employees accrue benefits on a prorated basis according to scheduled hours.",
+    "Documentation from a health care provider may be required for absences over three days.",
+]
+
+QUESTIONS = [
+    "Who is eligible for FMLA leave?",
+    "How many sick days do employees get each year?",
+    "Which holidays does the company observe?",
+    "What is the dress code policy?",
+    "Is employment at-will?",
+    "Can unused vacation days be carried over?",
+    "What happens if I report harassment?",
+    "When is payday?",
+    "Do part-time employees accrue benefits?",
+    "Is a doctor's note required for sick leave?",
+]
+
+
+def _section(rng: random.Random, topic: str, paragraphs: int) -> str:
+    body = []
+    for _ in range(paragraphs):
+        body.append(" ".join(rng.choice(_SENTENCES) for _ in range(rng.randint(4, 8))))
+    return f"{topic}\n\n" + "\n\n".join(body)
+
+
+def generate_corpus(target_dir: Path, n_files: int, sections_per_file: int = 6, seed: int = 0) -> List[Path]:
+    """Write ``n_files`` handbook-like .txt files and return their paths."""
+    rng = random.Random(seed)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+
+    for i in range(n_files):
+        topics = rng.sample(_TOPICS, k=min(sections_per_file, len(_TOPICS)))
+        text = f"Employee Handbook {i}\n\n" + "\n\n".join(
+            _section(rng, topic, paragraphs=rng.randint(2, 4)) for topic in topics
+        )
+        path = target_dir / f"handbook_{i:05d}.txt"
+        path.write_text(text, encoding="utf-8")
+        paths.append(path)
+
+    return paths
+
+
+def query_stream(n_queries: int, seed: int = 0) -> List[str]:
+    """Paraphrase-ish variants of the canned questions, deterministic per seed."""
+    rng = random.Random(seed)
+    prefixes = ["", "Quick question: ", "Can you tell me ", "Please explain: ", "I'd like to know "]
+    return [rng.choice(prefixes) + rng.choice(QUESTIONS) for _ in range(n_queries)]
@@ -0,0 +1,163 @@
+"""
+Delete-then-search consistency check for every vector index type.
+
+Builds a store per index type / encoding, deletes chunks from the front
+(so every surviving position has to shift), adds new ones (in memory, and
+through the streaming DiskStoreWriter path) and then checks
+that positions, docstore ids and search labels still line up: each chunk's
+own vector must find that chunk, every label must resolve, and the stored
+vectors must still be readable. Exits non-zero on any mismatch.
+
+    python -m benchmarks.delete_consistency --chunks 4000
+"""
+import argparse
+import json
+import sys
+import uuid
+from typing import Dict, List
+
+from benchmarks.fakes import fake_embeddings
+from company_policy_chat.src.document_ingestion import index_factory
+
+VARIANTS = (
+    ("flat", "none", True),
+    ("flat", "int8", False),
+    ("flat", "int8", True),
+    ("hnsw", "none", True),
+    ("hnsw", "fp16", True),
+    ("ivf", "none", True),
+    ("ivf", "int8", False),
+    ("ivf", "fp16", True),
+    ("ivf_pq", "none", True),
+)
+
+
+def _cfg(index_type: str, encoding: str, rescore: bool) -> Dict:
+    return {
+        "type": index_type,
+        "quantization": encoding,
+        "rescore": {"enabled": rescore, "k_factor": 4},
+        "hnsw": {"m": 16, "ef_construction": 80, "ef_search": 128},
+        "ivf": {"nlist": 64, "nprobe": 64},
+        "pq": {"m": 48, "nbits": 8},
+    }
+
+
+def _check(vs, embeddings, k: int) -> Dict:
+    """Self-recall@k plus structural invariants of a LangChain FAISS store."""
+    import numpy as np
+
+    index = vs.index
+    id_map = vs.index_to_docstore_id
+    problems: List[str] = []
+    if index.ntotal != len(id_map):
+        problems.append(f"ntotal {index.ntotal} != {len(id_map)} positions")
+    if sorted(id_map) != list(range(len(id_map))):
+        problems.append("positions are not 0..n-1")
+
+    try:
+        index_factory.all_vectors(index)
+    except RuntimeError as e:
+        problems.append(f"vectors unreadable: {e}")
+
+    texts = {doc_id: vs.docstore.search(doc_id).page_content for doc_id in id_map.values()}
+    queries = np.asarray(embeddings.embed_documents(list(texts.values())), dtype=np.float32)
+    _, labels = index.search(queries, k)
+
+    found = 0
+    for doc_id, row in zip(texts, labels):
+        hits = [id_map.get(int(label)) for label in row if label >= 0]
+        if None in hits:
+            problems.append("search returned a label with no docstore id")
+            break
+        found += doc_id in hits
+    return {"self_recall": round(found / max(1, len(texts)), 4), "problems": problems[:3]}
+
+
+def run_variant(index_type: str, encoding: str, rescore: bool, n_chunks: int, k: int) -> Dict:
+    from langchain_core.documents import Document
+
+    cfg = _cfg(index_type, encoding, rescore)
+    embeddings = fake_embeddings()
+    texts = [f"policy chunk {i}" for i in range(n_chunks)]
+    ids = [str(uuid.uuid4()) for _ in texts]
+    vs = index_factory.create_vectorstore(texts, [{} for _ in texts], ids, embeddings, cfg)
+
+    # Delete from the front and the middle so every later label has to move.
+    doomed = ids[: n_chunks // 10] + ids[n_chunks // 2: n_chunks // 2 + n_chunks // 20]
+    index_factory.delete_ids(vs, doomed, cfg)
+    added = [f"replacement chunk {i}" for i in range(n_chunks // 10)]
+    vs.add_documents([Document(page_content=t) for t in added], ids=[str(uuid.uuid4()) for _ in added])
+
+    return {
+        "index_type": index_type,
+        "encoding": encoding,
+        "rescore": index_factory.has_rescore(vs.index),
+        "vectors": vs.index.ntotal,
+        **_check(vs, embeddings, k),
+    }
+
+
+def run_stream_variant(index_type: str, encoding: str, rescore: bool, n_chunks: int, k: int) -> Dict:
+    """Same check on the streaming path: DiskStoreWriter on top of a saved store."""
+    import tempfile
+    from pathlib import Path
+
+    import faiss
+    from langchain_core.documents import Document
+
+    from company_policy_chat.src.document_ingestion import disk_store
+
+    cfg = _cfg(index_type, encoding, rescore)
+    embeddings = fake_embeddings()
+    texts = [f"policy chunk {i}" for i in range(n_chunks)]
+    ids = [str(uuid.uuid4()) for _ in texts]
+    vs = index_factory.create_vectorstore(texts, [{} for _ in texts], ids, embeddings, cfg)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base, out = Path(tmp) / "base", Path(tmp) / "out"
+        disk_store.save_disk_store(vs, base)
+
+        index = faiss.read_index(str(disk_store.faiss_path(base)))
+        index_factory.apply_search_params(index, cfg)
+        writer = disk_store.DiskStoreWriter(out, base=base)
+        added = [f"replacement chunk {i}" for i in range(n_chunks // 10)]
+        index = index_factory.append_vectors(index, embeddings.embed_documents(added), cfg)
+        writer.append([str(uuid.uuid4()) for _ in added], [Document(page_content=t) for t in added])
+
+        doomed = ids[: n_chunks // 10] + ids[n_chunks // 2: n_chunks // 2 + n_chunks // 20]
+        index = index_factory.remove_positions(index, writer.remove(doomed), cfg)
+        index = index_factory.finish_stream(index, cfg)
+        index_factory.apply_search_params(index, cfg)
+        writer.commit(index)
+
+        served = disk_store.load_disk_store(out, embeddings)
+        index_factory.apply_search_params(served.index, cfg)
+        return {
+            "index_type": index_type,
+            "encoding": encoding,
+            "rescore": index_factory.has_rescore(served.index),
+            "mode": "stream",
+            "vectors": served.index.ntotal,
+            **_check(served, embeddings, k),
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Delete-then-search consistency check per index type")
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    rows = [run(t, e, r, args.chunks, args.k) for run in (run_variant, run_stream_variant) for t, e, r in VARIANTS]
+    print(json.dumps(rows, indent=2))
+
+    failed = [row for row in rows if row["problems"] or row["self_recall"] < args.min_recall]
+    for row in failed:
+        print(f"FAILED {row['index_type']}/{row['encoding']}: {row}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat endpoint.
+
+Simulates the behaviour the LLM client layer has to cope with: a
+server-side rate limit answered with 429 + Retry-After, a base latency, a
+fraction of slow stragglers and occasional 5xx errors. Point ChatGroq at it
+with ``base_url=server.url``.
+
+    python -m benchmarks.fake_groq --port 8099 --rps 20 --slow-fraction 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from benchmarks.fakes import STUB_ANSWER
+
+
+class FakeGroqServer:
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rps: Optional[float] = None,
+        latency_s: float = 0.05,
+        slow_fraction: float = 0.0,
+        slow_s: float = 2.0,
+        error_rate: float = 0.0,
+        retry_after_s: float = 1.0,
+        seed: int = 0,
+    ):
+        self.rps = rps
+        self.latency_s = latency_s
+        self.slow_fraction = slow_fraction
+        self.slow_s = slow_s
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._allowance = rps or 0.0
+        self._checked = time.monotonic()
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0, "slow": 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _admit(self) -> str:
+        """Decide the fate of one request: ok, slow, throttled or error."""
+        with self._lock:
+            self.counts["requests"] += 1
+
+            if self.rps:
+                now = time.monotonic()
+                self._allowance = min(self.rps, self._allowance + (now - self._checked) * self.rps)
+                self._checked = now
+                if self._allowance < 1:
+                    self.counts["throttled"] += 1
+                    return "throttled"
+                self._allowance -= 1
+
+            roll = self._rng.random()
+            if roll < self.error_rate:
+                self.counts["errors"] += 1
+                return "error"
+            if roll < self.error_rate + self.slow_fraction:
+                self.counts["slow"] += 1
+                return "slow"
+            self.counts["ok"] += 1
+            return "ok"
+
+    def _handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": "not found"}})
+                    return
+
+                fate = server._admit()
+                if fate == "throttled":
+                    self._reply(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                        {"retry-after": f"{server.retry_after_s:g}"},
+                    )
+                    return
+                if fate == "error":
+                    self._reply(503, {"error": {"message": "Service unavailable", "type": "internal_server_error"}})
+                    return
+
+                time.sleep(server.slow_s if fate == "slow" else server.latency_s)
+
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+                completion_tokens = len(STUB_ANSWER) // 4
+                self._reply(200, {
+                    "id": f"chatcmpl-fake-{server.counts['requests']}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": STUB_ANSWER},
+                        "finish_reason": "stop",
+                        "logprobs": None,
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                })
+
+            def log_message(self, *args):
+                pass
+
+        return _Handler
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeGroqServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fake Groq chat-completions server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rps", type=float, default=None, help="server-side rate limit; excess gets 429")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-fraction", type=float, default=0.0)
+    parser.add_argument("--slow-s", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = FakeGroqServer(
+        port=args.port,
+        rps=args.rps,
+        latency_s=args.latency,
+        slow_fraction=args.slow_fraction,
+        slow_s=args.slow_s,
+        error_rate=args.error_rate,
+    )
+    print(f"fake Groq listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.counts))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
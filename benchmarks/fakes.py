@@ -0,0 +1,50 @@
+"""Deterministic offline stand-ins for ChatGroq and FastEmbed."""
+import threading
+from typing import List
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+STUB_ANSWER = (
+    "According to the handbook, eligible employees may take leave as described in "
+    "the relevant policy section. Please confirm details with your supervisor."
+)
+
+
+def fake_chat_model(latency_s: float = 0.0) -> FakeListChatModel:
+    """Chat model that always answers with STUB_ANSWER after ``latency_s``.
+
+    Both the question rewrite and the final answer go through it, so a
+    non-zero latency simulates two Groq round trips per uncached query.
+    """
+    return FakeListChatModel(responses=[STUB_ANSWER], sleep=latency_s or None)
+
+
+class CountingEmbeddings(Embeddings):
+    """Wraps an embedder and counts how many texts it actually embedded."""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+        self.documents = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.documents += len(texts)
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            self.queries += 1
+        return self.inner.embed_query(text)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.documents = 0
+            self.queries = 0
+
+
+def fake_embeddings(size: int = 384) -> CountingEmbeddings:
+    """Hash-seeded vectors with the bge-small dimension; no model download."""
+    return CountingEmbeddings(DeterministicFakeEmbedding(size=size))
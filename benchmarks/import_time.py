@@ -0,0 +1,80 @@
+"""
+Import-time budget check.
+
+Each module is imported in a fresh interpreter so nothing is already cached,
+and the best of ``--repeat`` runs is compared with the budget. Exits non-zero
+when any module is over budget, so it can gate CI:
+
+    python -m benchmarks.import_time --budget 1.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+DEFAULT_MODULES = [
+    "company_policy_chat.src.document_retrieval.retrieval",
+    "company_policy_chat.src.document_ingestion.ingestion",
+    "company_policy_chat.utils.file_utils",
+]
+
+# Modules that must stay out of the import graph until first use.
+LAZY_MODULES = [
+    "langchain_community.vectorstores",
+    "langchain_community.document_loaders",
+    "fastembed",
+    "faiss",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict:
+    best = None
+    loaded: List[str] = []
+
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, lazy=LAZY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best:
+            best = result["seconds"]
+        loaded = result["loaded"]
+
+    return {"module": module, "seconds": best, "eagerly_loaded": loaded}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds per module")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        over_budget = result["seconds"] > args.budget
+        failed = failed or over_budget or bool(result["eagerly_loaded"])
+
+        status = "FAIL" if over_budget or result["eagerly_loaded"] else "ok"
+        print(f"{status:4} {result['seconds']:.3f}s  {module}")
+        if result["eagerly_loaded"]:
+            print(f"     eagerly imported: {', '.join(result['eagerly_loaded'])}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Load-test the LLM client layer against the fake Groq server.
+
+Fires the same burst of requests through a bare ChatGroq (no retries) and
+through ResilientChatModel, and reports success rate, latency percentiles,
+server-side 429s and the wrapper's retry / hedge counters.
+
+    python -m benchmarks.llm_client --requests 200 --concurrency 32 --rps 20 \\
+        --slow-fraction 0.05 --hedge-after 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from benchmarks.fake_groq import FakeGroqServer  # noqa: E402
+from company_policy_chat.utils.llm_client import ResilientChatModel  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _burst(llm, n_requests: int, concurrency: int) -> Dict:
+    def one(i: int):
+        start = time.perf_counter()
+        try:
+            llm.invoke(f"Question {i}: how many sick days do employees get?")
+            return True, (time.perf_counter() - start) * 1000
+        except Exception:
+            return False, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [ms for ok, ms in outcomes if ok]
+    report = {
+        "requests": n_requests,
+        "succeeded": len(latencies),
+        "failed": n_requests - len(latencies),
+        "seconds": round(elapsed, 3),
+    }
+    if latencies:
+        report.update({
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p90_ms": round(_percentile(latencies, 90), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+        })
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="LLM client layer load test (offline)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="caller threads")
+    parser.add_argument("--rps", type=float, default=20, help="fake server rate limit")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--slow-s", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--max-concurrency", type=int, default=8, help="wrapper semaphore size")
+    parser.add_argument("--client-rpm", type=float, default=None, help="wrapper token bucket (requests/min)")
+    parser.add_argument("--hedge-after", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    from langchain_groq import ChatGroq
+
+    results = {}
+    for label in ("bare", "resilient"):
+        server = FakeGroqServer(
+            rps=args.rps,
+            latency_s=args.latency,
+            slow_fraction=args.slow_fraction,
+            slow_s=args.slow_s,
+            error_rate=args.error_rate,
+        )
+        with server:
+            groq = ChatGroq(model="llama-3.1-8b-instant", base_url=server.url, max_retries=0, timeout=30)
+            llm = groq if label == "bare" else ResilientChatModel(
+                inner=groq,
+                max_concurrency=args.max_concurrency,
+                requests_per_minute=args.client_rpm,
+                backoff_base_s=0.1,
+                backoff_max_s=2.0,
+                hedge_after_s=args.hedge_after,
+            )
+            report = _burst(llm, args.requests, args.concurrency)
+            report["server"] = dict(server.counts)
+            if isinstance(llm, ResilientChatModel):
+                report["client"] = llm.stats()
+        results[label] = report
+
+    print(json.dumps(results, indent=2))
+    return 0 if results["resilient"]["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Cost of a log call on the request path.
+
+Runs the same burst of ``rag_request``-sized info events under each logging
+mode, each in a fresh process writing to a temporary directory, and reports
+the caller-side latency per call plus how long the writer needed to drain:
+
+    sync      handlers called inline (rendering + file write in the caller)
+    queue     records enqueued, rendered and written by the listener thread
+    sampled   queue, with the event sampled at --sample-rate
+    filtered  queue, with the level set above INFO
+
+    python -m benchmarks.logging_overhead --calls 50000 --threads 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+MODES = ("sync", "queue", "sampled", "filtered")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _mode_config(mode: str, sample_rate: float, console: bool) -> Dict:
+    return {
+        "level": "WARNING" if mode == "filtered" else "INFO",
+        "json": True,
+        "console": console,
+        "queue": mode != "sync",
+        "queue_size": 10000,
+        "rotation": {"when": "size", "max_bytes": 64 * 1024 * 1024, "backup_count": 1},
+        "sampling": {"rag_request": sample_rate} if mode == "sampled" else {},
+    }
+
+
+def _worker(mode: str, calls: int, threads: int, sample_rate: float, console: bool, log_dir: str) -> Dict:
+    from company_policy_chat.logger.custom_logger import configure_logging, logging_stats, shutdown_logging
+
+    configure_logging(log_dir=log_dir, cfg=_mode_config(mode, sample_rate, console))
+
+    import structlog
+
+    log = structlog.get_logger("benchmark")
+    stages = {"rewrite": 1.2, "retrieve": 8.4, "rerank": 21.7, "generate": 412.0}
+    per_thread = max(1, calls // threads)
+    latencies: List[List[float]] = [[] for _ in range(threads)]
+
+    def run(slot: int) -> None:
+        out = latencies[slot]
+        for i in range(per_thread):
+            start = time.perf_counter_ns()
+            log.info("rag_request", request_id=f"{slot}-{i}", path="chain", status="ok", total_ms=443.3, stages_ms=stages)
+            out.append((time.perf_counter_ns() - start) / 1000)
+
+    for i in range(1000):
+        log.info("warmup", i=i)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=run, args=(slot,)) for slot in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stats = logging_stats()
+    drain_start = time.perf_counter()
+    shutdown_logging()
+    drain_s = time.perf_counter() - drain_start
+
+    values = [us for out in latencies for us in out]
+    return {
+        "mode": mode,
+        "calls": len(values),
+        "threads": threads,
+        "calls_per_s": round(len(values) / elapsed),
+        "mean_us": round(sum(values) / len(values), 2),
+        "p50_us": round(_percentile(values, 50), 2),
+        "p99_us": round(_percentile(values, 99), 2),
+        "max_us": round(max(values), 2),
+        "drain_s": round(drain_s, 3),
+        "log_bytes": sum(os.path.getsize(os.path.join(log_dir, f)) for f in os.listdir(log_dir)),
+        **stats,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Log call overhead per logging mode")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=1, help="concurrent logging threads")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--console", action="store_true", help="also write to stderr (discarded)")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--log-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        report = _worker(args.worker, args.calls, args.threads, args.sample_rate, args.console, args.log_dir)
+        print(json.dumps(report))
+        return 0
+
+    # Logging is configured once per process, so every mode gets its own.
+    results = {}
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as log_dir:
+            cmd = [
+                sys.executable, "-m", "benchmarks.logging_overhead",
+                "--worker", mode, "--log-dir", log_dir,
+                "--calls", str(args.calls), "--threads", str(args.threads),
+                "--sample-rate", str(args.sample_rate),
+            ]
+            if args.console:
+                cmd.append("--console")
+            out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(json.dumps(results, indent=2))
+    for mode, row in results.items():
+        print(
+            f"{mode:<9} p50 {row['p50_us']:8.2f} us  p99 {row['p99_us']:8.2f} us"
+            f"  {row['calls_per_s']:>9} calls/s  drain {row['drain_s']:.3f}s  dropped {row['dropped']}",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Memory / recall trade-off of scalar-quantised vector storage.
+
+Builds the configured index type over the same vectors as float32, fp16 and
+int8 (with and without exact re-scoring) and reports serialised size, the
+share of memory saved and recall@k against an exact float32 search.
+
+    python -m benchmarks.quantization --vectors 50000 --k 10
+    python -m benchmarks.quantization --index-dir faiss_index
+"""
+import argparse
+import json
+import sys
+
+from company_policy_chat.src.document_ingestion import index_factory
+from company_policy_chat.utils.config_loader import load_config
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 64, seed: int = 0):
+    """Unit-norm vectors around random centres, roughly like sentence embeddings."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, size=n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scalar quantisation memory/recall report")
+    parser.add_argument("--index-dir", default=None, help="report on an existing index instead of synthetic vectors")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384, help="bge-small-en-v1.5 is 384-d")
+    parser.add_argument("--index-type", default=None, help="flat | hnsw | ivf (default: from config)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.index_dir:
+        from company_policy_chat.src.document_ingestion.ingestion import FaissManager
+
+        report = FaissManager(index_dir=args.index_dir).quantization_report(k=args.k, n_queries=args.queries)
+    else:
+        cfg = load_config().get("vector_index", {})
+        report = {
+            "vectors": args.vectors,
+            "dim": args.dim,
+            "k": args.k,
+            "variants": index_factory.quantization_report(
+                synthetic_vectors(args.vectors, args.dim),
+                cfg,
+                index_type=args.index_type,
+                k=args.k,
+                n_queries=args.queries,
+            ),
+        }
+
+    print(json.dumps(report, indent=2))
+    for row in report["variants"]:
+        label = f"{row['encoding']}{'+rescore' if row['rescore'] else ''}"
+        print(
+            f"{label:<14} index {row['index_bytes'] / 2**20:8.2f} MiB  saved {row['index_saved']:6.1%}"
+            f"  rescore {row['rescore_bytes'] / 2**20:8.2f} MiB  recall@{report['k']} {row['recall']:.4f}",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
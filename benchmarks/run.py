@@ -0,0 +1,257 @@
+"""
+Offline performance benchmark for ingestion and retrieval.
+
+Runs without network access or API keys: ChatGroq is replaced by a
+deterministic fake chat model and FastEmbed by hash-seeded fake vectors
+(pass --real-embeddings to use the configured FastEmbed model instead).
+The fake model sits behind the configured llm_client wrapper, so its rate
+limits show up in query latency (--bare-llm skips it, --llm-rpm overrides).
+
+    python -m benchmarks.run --sizes 10 50 200 --queries 200
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from benchmarks.corpus import generate_corpus, query_stream  # noqa: E402
+from benchmarks.fakes import CountingEmbeddings, fake_chat_model, fake_embeddings  # noqa: E402
+from company_policy_chat.utils.metrics import get_metrics  # noqa: E402
+from company_policy_chat.utils.registry import get_registry  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size; unlike ru_maxrss it can be compared before and after a phase."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None  # not Linux
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def bench_ingestion(
+    workdir: Path,
+    n_files: int,
+    embeddings: CountingEmbeddings,
+    chunk_size: int,
+    chunk_overlap: int,
+    stream: bool = False,
+) -> Dict:
+    from company_policy_chat.src.document_ingestion.ingestion import Ingestion
+    from company_policy_chat.src.document_ingestion import snapshots
+    from company_policy_chat.src.document_ingestion.manifest import IngestionManifest
+    from company_policy_chat.utils.file_utils import load_documents
+
+    corpus = generate_corpus(workdir / "corpus", n_files)
+    faiss_dir = workdir / "faiss"
+    embeddings.reset()
+
+    files = [open(path, "rb") for path in corpus]
+    try:
+        ingestor = Ingestion(temp_base=str(workdir / "data"), faiss_base=str(faiss_dir))
+        start = time.perf_counter()
+        ingest = ingestor.stream_index if stream else ingestor.build_index
+        ingest(files, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        elapsed = time.perf_counter() - start
+    finally:
+        for f in files:
+            f.close()
+
+    manifest = IngestionManifest(snapshots.resolve(faiss_dir))
+    chunks = sum(len(manifest.ids_for(source)) for source in manifest.sources())
+    # Counted from the loaders' own output, outside the timed region.
+    pages = len(load_documents(corpus))
+
+    return {
+        "files": n_files,
+        "pages": pages,
+        "chunks": chunks,
+        "embeddings": embeddings.documents,
+        "seconds": round(elapsed, 4),
+        "pages_per_s": round(pages / elapsed, 2),
+        "chunks_per_s": round(chunks / elapsed, 2),
+        "embeddings_per_s": round(embeddings.documents / elapsed, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),  # process-wide peak so far
+        "index_dir": str(faiss_dir),
+    }
+
+
+def bench_queries(index_dir: str, n_queries: int, use_answer_cache: bool) -> Dict:
+    from company_policy_chat.src.document_retrieval.retrieval import Retrieval
+
+    # ru_maxrss would include ingestion's peak; measure this phase's growth instead.
+    rss_before = _rss_mb()
+    retrieval = Retrieval()
+    if not use_answer_cache:
+        retrieval.answer_cache = None
+    elif retrieval.answer_cache is None:
+        from company_policy_chat.src.document_retrieval.answer_cache import SemanticAnswerCache
+        from company_policy_chat.utils.registry import get_registry
+
+        retrieval.answer_cache = SemanticAnswerCache(get_registry().get_embeddings())
+    retrieval.load_retriever_from_faiss(index_path=index_dir)
+
+    latencies_ms: List[float] = []
+    for question in query_stream(n_queries):
+        start = time.perf_counter()
+        retrieval.invoke(question, chat_history=[])
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+    rss_after = _rss_mb()
+
+    return {
+        "queries": n_queries,
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "p50_ms": round(_percentile(latencies_ms, 50), 3),
+        "p90_ms": round(_percentile(latencies_ms, 90), 3),
+        "p99_ms": round(_percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "answer_cache": retrieval.answer_cache_stats(),
+        "rewrite": retrieval.rewrite_stats(),
+        "context": retrieval.context_stats(),
+        "history": retrieval.history_stats(),
+        "rss_mb": _round(rss_after),
+        "rss_growth_mb": _round(rss_after - rss_before) if rss_before is not None else None,
+    }
+
+
+def bench_batch(index_dir: str, n_queries: int, max_concurrency: int) -> Dict:
+    from company_policy_chat.src.document_retrieval.retrieval import Retrieval
+
+    retrieval = Retrieval()
+    retrieval.answer_cache = None
+    retrieval.load_retriever_from_faiss(index_path=index_dir)
+
+    questions = query_stream(n_queries, seed=1)
+    start = time.perf_counter()
+    answers = retrieval.batch(questions, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries": n_queries,
+        "max_concurrency": max_concurrency,
+        "seconds": round(elapsed, 4),
+        "queries_per_s": round(n_queries / elapsed, 2),
+        "failed": sum(1 for answer in answers if not answer.ok),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline ingestion/retrieval benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="corpus sizes in files")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--answer-cache", action="store_true", help="turn the answer cache on (off by default in config.yaml)")
+    parser.add_argument("--batch-concurrency", type=int, default=8, help="max LLM calls in flight for the batch run")
+    parser.add_argument("--real-embeddings", action="store_true", help="use the configured FastEmbed model")
+    parser.add_argument("--stream", action="store_true", help="ingest with the bounded-memory streaming path")
+    parser.add_argument("--bare-llm", action="store_true", help="skip the llm_client wrapper (rate limits, retries)")
+    parser.add_argument("--llm-rpm", type=float, default=None, help="override llm_client.requests_per_minute")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    loader = registry.get_model_loader()
+    embeddings = (
+        CountingEmbeddings(loader.load_embedding())
+        if args.real_embeddings else fake_embeddings()
+    )
+    # The fake answers instantly; wrapping it like load_llm does keeps the
+    # configured admission limits (and their waits) in the measured path.
+    llm = fake_chat_model(args.llm_latency)
+    client_cfg = dict(loader.config.get("llm_client", {}))
+    if args.llm_rpm is not None:
+        client_cfg["requests_per_minute"] = args.llm_rpm
+    if not args.bare_llm:
+        llm = loader._wrap_llm(llm, client_cfg)
+    registry.override(embeddings=embeddings, llm=llm)
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "embeddings": "fastembed" if args.real_embeddings else "fake",
+            "llm_latency_s": args.llm_latency,
+            "ingest_mode": "stream" if args.stream else "batch",
+            "llm_client": None if args.bare_llm else {
+                key: client_cfg.get(key) for key in ("max_concurrency", "requests_per_minute", "tokens_per_minute")
+            },
+        },
+        "ingestion": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="cpc-bench-") as tmp:
+        last_index = None
+        for size in args.sizes:
+            workdir = Path(tmp) / f"corpus_{size}"
+            run = bench_ingestion(workdir, size, embeddings, args.chunk_size, args.chunk_overlap, args.stream)
+            last_index = run.pop("index_dir")
+            results["ingestion"].append(run)
+            print(f"ingest {size:>6} files: {run['chunks_per_s']:>10.1f} chunks/s  {run['seconds']:.3f}s")
+
+        results["query"] = bench_queries(last_index, args.queries, args.answer_cache)
+        q = results["query"]
+        print(f"query  p50 {q['p50_ms']:.2f}ms  p90 {q['p90_ms']:.2f}ms  p99 {q['p99_ms']:.2f}ms")
+
+        results["batch"] = bench_batch(last_index, args.queries, args.batch_concurrency)
+        print(f"batch  {results['batch']['queries_per_s']:.1f} queries/s")
+
+    if hasattr(llm, "stats"):
+        results["llm_client"] = llm.stats()
+        print(f"llm    {results['llm_client']['calls']} calls, {results['llm_client']['admission_wait_ms']}ms admission wait")
+
+    results["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    results["stages"] = get_metrics().dump()
+
+    output = args.output or RESULTS_DIR / f"{results['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
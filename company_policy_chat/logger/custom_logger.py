@@ -1,22 +1,317 @@
-import os
+import atexit
 import logging
-from datetime import datetime
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
 import structlog
 
-class CustomLogger():
-    def __init__(self, log_dir="logs", level=logging.INFO):
-        os.makedirs(log_dir,exist_ok=True)
-
-        log_file = os.path.join(log_dir,f"{datetime.utcnow().strftime("%Y_%m_%d_%H_%M_%S")}.log")
-
-        logging.basicConfig(
-            level=level,
-            format="%(message)s",
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
+from company_policy_chat.utils.config_loader import load_config
+
+_lock = threading.RLock()
+_state: Dict[str, Any] = {}
+
+
+class EventSampler:
+    """
+    structlog processor that keeps only a fraction of high-volume events.
+
+    Rates are per event name (``{"Rerank finished": 0.1}``). Kept events
+    carry ``sample_rate`` so counts can be re-weighted downstream; warnings
+    and errors are never sampled.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.rates = {event: float(rate) for event, rate in (rates or {}).items()}
+        self.dropped = 0
+        self._random = random.Random(seed)
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None or rate >= 1 or method_name not in ("debug", "info"):
+            return event_dict
+        if self._random.random() >= rate:
+            self.dropped += 1
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the writer thread without formatting them first.
+
+    When the queue is full, info/debug records are dropped and counted;
+    warnings and above wait briefly for room instead.
+    """
+
+    def __init__(self, q: queue.Queue, block_s: float = 1.0):
+        super().__init__(q)
+        self.block_s = block_s
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the listener thread; the record stays in-process.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.block_s)
+                return
+            except queue.Full:
+                pass
+        self.dropped += 1
+
+
+def _capture_exc_info(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # The traceback must be taken on the calling thread; it is rendered later.
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _timestamp_from_record(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    record = event_dict.get("_record")
+    created = record.created if record is not None else time.time()
+    event_dict.setdefault(
+        "timestamp",
+        datetime.fromtimestamp(created, timezone.utc).isoformat(timespec="milliseconds"),
+    )
+    return event_dict
+
+
+def _formatter(json_output: bool) -> structlog.stdlib.ProcessorFormatter:
+    if json_output:
+        tail = [structlog.processors.format_exc_info, structlog.processors.JSONRenderer()]
+    else:
+        tail = [structlog.dev.ConsoleRenderer(colors=False)]
+    return structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[structlog.stdlib.add_log_level, structlog.stdlib.add_logger_name],
+        processors=[
+            _timestamp_from_record,
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            *tail,
+        ],
+    )
+
+
+def _file_handler(path: str, rotation: Dict[str, Any]) -> logging.Handler:
+    when = str(rotation.get("when", "size"))
+    backups = rotation.get("backup_count", 5)
+    if when == "size":
+        return logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=rotation.get("max_bytes", 10 * 1024 * 1024),
+            backupCount=backups,
+            encoding="utf-8",
+        )
+    return logging.handlers.TimedRotatingFileHandler(
+        path,
+        when=when,
+        interval=rotation.get("interval", 1),
+        backupCount=backups,
+        encoding="utf-8",
+        utc=True,
+    )
+
+
+def _level(value: Any) -> int:
+    return value if isinstance(value, int) else getattr(logging, str(value).upper())
+
+
+class _DeferredHandler(logging.Handler):
+    """
+    Placeholder on the root logger until the first record arrives.
+
+    Importing a module only configures structlog; the log file, console
+    handler and writer thread are created by whichever record needs them
+    first, so processes that never log leave no file behind.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in start_logging():
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+def configure_logging(
+    log_dir: Optional[str] = None,
+    level: Optional[int] = None,
+    cfg: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Configure structlog and stdlib logging once per process.
+
+    Calls only pay for the level check, sampling and an enqueue; a
+    QueueListener thread renders JSON and does the (rotating) file and
+    console writes. ``cfg`` replaces the ``logging`` section of config.yaml.
+    Handlers are opened lazily by the first record (or ``start_logging``).
+    """
+    with _lock:
+        if _state:
+            return
+
+        cfg = load_config().get("logging", {}) if cfg is None else cfg
+        log_dir = log_dir or cfg.get("dir", "logs")
+        level = _level(level if level is not None else cfg.get("level", "INFO"))
+        filename = cfg.get("file") or f"{datetime.now(timezone.utc).strftime('%Y_%m_%d_%H_%M_%S')}.log"
+        _state.update(cfg=cfg, level=level, path=os.path.join(log_dir, filename))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        deferred = _DeferredHandler()
+        root.addHandler(deferred)
+        _state["deferred"] = deferred
+
+        sampler = EventSampler(cfg.get("sampling"))
+        _state["sampler"] = sampler
+        structlog.configure(
+            processors=[
+                structlog.stdlib.filter_by_level,
+                _capture_exc_info,
+                sampler,
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+            ],
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            wrapper_class=structlog.stdlib.BoundLogger,
+            cache_logger_on_first_use=True,
+        )
+        atexit.register(shutdown_logging)
+
+
+def start_logging() -> List[logging.Handler]:
+    """
+    Open the log file and console handler and start the writer thread.
+
+    Idempotent; returns the handlers that replaced the placeholder on the
+    root logger. After ``shutdown_logging`` the handlers are attached
+    directly, without a queue.
+    """
+    configure_logging()
+    with _lock:
+        if "active" in _state:
+            return _state["active"]
+
+        cfg = _state["cfg"]
+        path = _state["path"]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file_handler = _file_handler(path, cfg.get("rotation", {}))
+        file_handler.setFormatter(_formatter(cfg.get("json", True)))
+        handlers = [file_handler]
+        if cfg.get("console", True):
+            console = logging.StreamHandler()
+            console.setFormatter(_formatter(cfg.get("console_json", False)))
+            handlers.append(console)
+        _state["handlers"] = handlers
+
+        active: List[logging.Handler] = handlers
+        if cfg.get("queue", True) and not _state.get("stopped"):
+            records: queue.Queue = queue.Queue(maxsize=cfg.get("queue_size", 10000))
+            queue_handler = _NonBlockingQueueHandler(records)
+            listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+            listener.start()
+            _state.update(queue=records, queue_handler=queue_handler, listener=listener)
+            active = [queue_handler]
+
+        # One assignment, so concurrent callers never see the root logger
+        # with neither the placeholder nor the real handlers.
+        root = logging.getLogger()
+        root.handlers = [h for h in root.handlers if h is not _state["deferred"]] + active
+        _state["active"] = active
+        return active
+
+
+def shutdown_logging() -> None:
+    """
+    Drain the queue and stop the writer thread; registered with atexit.
+
+    The queue handler is swapped for the direct handlers so records logged
+    afterwards (e.g. by later atexit hooks) are still written. The handlers
+    stay open and are flushed and closed by ``logging.shutdown``. A no-op
+    if nothing was ever logged.
+    """
+    with _lock:
+        if not _state:
+            return
+        _state["stopped"] = True
+        listener = _state.pop("listener", None)
+        if listener is None:
+            return
+        listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(_state["queue_handler"])
+        handlers = _state.get("handlers", [])
+        for handler in handlers:
+            root.addHandler(handler)
+            handler.flush()
+        _state["active"] = handlers
+
+
+def worker_logging_settings() -> Dict[str, Any]:
+    """Picklable settings for ``configure_worker_logging`` in a child process."""
+    configure_logging()
+    return {"path": _state["path"], "level": _state["level"], "cfg": _state["cfg"]}
+
+
+def configure_worker_logging(settings: Dict[str, Any]) -> None:
+    """
+    Process-pool initializer: log straight to the parent's file.
+
+    A queue handler inherited across ``fork`` would feed a listener thread
+    that does not exist in the child, so any inherited setup is discarded.
+    Workers append without a queue and never rotate; rotation stays with
+    the parent.
+    """
+    with _lock:
+        if _state:
+            root = logging.getLogger()
+            for handler in [_state["deferred"], *_state.get("active", [])]:
+                root.removeHandler(handler)
+            _state.clear()
+        cfg = dict(
+            settings["cfg"],
+            file=os.path.basename(settings["path"]),
+            queue=False,
+            rotation={"when": "size", "max_bytes": 0},
         )
-        
-    def get_logger(self,name:str):
-        return structlog.get_logger(name)
\ No newline at end of file
+        configure_logging(log_dir=os.path.dirname(settings["path"]), level=settings["level"], cfg=cfg)
+
+
+def logging_stats() -> Dict[str, int]:
+    records = _state.get("queue")
+    queue_handler = _state.get("queue_handler")
+    sampler = _state.get("sampler")
+    return {
+        "queued": records.qsize() if records is not None else 0,
+        "dropped": queue_handler.dropped if queue_handler is not None else 0,
+        "sampled_out": sampler.dropped if sampler is not None else 0,
+    }
+
+
+class CustomLogger():
+    # Logging is process-global; only the first instance configures it, so
+    # importing several modules does not create several log files or writers.
+
+    def __init__(self, log_dir: Optional[str] = None, level: Optional[int] = None):
+        configure_logging(log_dir=log_dir, level=level)
+
+    def get_logger(self, name: str):
+        return structlog.get_logger(name)
@@ -48,6 +48,21 @@ CONTEXTUALIZE_QUESTION_PROMPT = ChatPromptTemplate.from_messages([
 ])
 
 
+# ---------- Running Chat Summary Prompt ----------
+
+
+SUMMARIZE_HISTORY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "You maintain a running summary of a conversation between an employee and an HR policy assistant. "
+        "Update the existing summary with the new lines. Keep the policy topics discussed, facts the user shared "
+        "about themselves, and any answers they may refer back to. Drop greetings and repetition. "
+        "Write plain prose of at most 150 words and return only the updated summary."
+    ),
+    ("human", "Current summary:\n{summary}\n\nNew lines:\n{lines}")
+])
+
+
 CONTEXT_QA_PROMPT = ChatPromptTemplate.from_messages([
     (
         "system",
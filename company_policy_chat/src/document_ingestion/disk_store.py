@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+def docstore_path(folder: Union[str, Path], index_name: str = "index") -> Path:
+    return Path(folder) / f"{index_name}.docstore.sqlite"
+
+
+def faiss_path(folder: Union[str, Path], index_name: str = "index") -> Path:
+    return Path(folder) / f"{index_name}.faiss"
+
+
+def _close_all(conns: Dict[int, sqlite3.Connection]) -> None:
+    for conn in list(conns.values()):
+        conn.close()
+    conns.clear()
+
+
+class _ReadOnlySqlite:
+    """
+    One read-only SQLite connection per thread; no shared cursor state.
+
+    Connections are keyed by thread id so they can be released without
+    pulling one from under a running query: those of exited threads are
+    closed when the next one opens or on ``close``, which also closes the
+    calling thread's own. The rest close when the last holder of the store
+    drops it; an open handle keeps the file readable even after snapshot
+    garbage collection has unlinked it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        weakref.finalize(self, _close_all, self._conns)
+
+    def conn(self) -> sqlite3.Connection:
+        ident = threading.get_ident()
+        conn = self._conns.get(ident)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            with self._lock:
+                self._close_dead()
+                self._conns[ident] = conn
+        return conn
+
+    def _close_dead(self) -> None:
+        alive = {thread.ident for thread in threading.enumerate()}
+        for dead in [i for i in self._conns if i not in alive]:
+            self._conns.pop(dead).close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_dead()
+            conn = self._conns.pop(threading.get_ident(), None)
+        if conn is not None:
+            conn.close()
+
+
+class SqliteDocstore(Docstore):
+    """
+    Read-only docstore that fetches chunk text and metadata on demand.
+
+    Only the top-k hits of a query are ever read, so the corpus text stays
+    in the OS page cache, shared by every worker process, instead of being
+    unpickled into each one.
+    """
+
+    def __init__(self, path: Path, db: Optional[_ReadOnlySqlite] = None):
+        self._db = db or _ReadOnlySqlite(path)
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._db.conn().execute(
+            "SELECT content, metadata FROM docs WHERE id = ?", (search,)
+        ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def all_items(self) -> Iterator:
+        for doc_id, content, metadata in self._db.conn().execute("SELECT id, content, metadata FROM docs"):
+            yield doc_id, Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        raise NotImplementedError("SqliteDocstore is read-only; write through FaissManager")
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("SqliteDocstore is read-only; write through FaissManager")
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class SqliteIdMap(Mapping):
+    """Lazy ``index position -> docstore id`` mapping backed by the same SQLite file."""
+
+    def __init__(self, path: Path, db: Optional[_ReadOnlySqlite] = None):
+        self._db = db or _ReadOnlySqlite(path)
+        (self._len,) = self._db.conn().execute("SELECT COUNT(*) FROM positions").fetchone()
+
+    def __getitem__(self, pos: int) -> str:
+        row = self._db.conn().execute("SELECT doc_id FROM positions WHERE pos = ?", (int(pos),)).fetchone()
+        if row is None:
+            raise KeyError(pos)
+        return row[0]
+
+    def __iter__(self):
+        for (pos,) in self._db.conn().execute("SELECT pos FROM positions ORDER BY pos"):
+            yield pos
+
+    def __len__(self) -> int:
+        return self._len
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def save_disk_store(vs, folder: Union[str, Path], index_name: str = "index") -> None:
+    """Write the vector index and an SQLite docstore, each via temp file + rename."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    db_path = docstore_path(folder, index_name)
+    tmp_db = db_path.with_suffix(".sqlite.tmp")
+    if tmp_db.exists():
+        tmp_db.unlink()
+
+    conn = sqlite3.connect(str(tmp_db))
+    try:
+        _create_tables(conn)
+        conn.executemany(
+            "INSERT INTO positions (pos, doc_id) VALUES (?, ?)",
+            ((int(pos), doc_id) for pos, doc_id in vs.index_to_docstore_id.items()),
+        )
+        conn.executemany(
+            "INSERT INTO docs (id, content, metadata) VALUES (?, ?, ?)",
+            (
+                (doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+                for doc_id, doc in _docstore_items(vs)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    _install(vs.index, tmp_db, folder, index_name)
+    log.info("FAISS disk store saved", path=str(folder), vectors=vs.index.ntotal)
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE TABLE docs (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)")
+    conn.execute("CREATE TABLE positions (pos INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)")
+
+
+def _install(index, tmp_db: Path, folder: Path, index_name: str) -> None:
+    """Write the vector index and move it and the finished docstore into place."""
+    import faiss
+
+    index_file = faiss_path(folder, index_name)
+    tmp_index = index_file.with_suffix(".faiss.tmp")
+    faiss.write_index(index, str(tmp_index))
+
+    os.replace(tmp_db, docstore_path(folder, index_name))
+    os.replace(tmp_index, index_file)
+
+    # A leftover pickle would be picked up by the legacy loader; drop it.
+    legacy_pickle = folder / f"{index_name}.pkl"
+    if legacy_pickle.exists():
+        legacy_pickle.unlink()
+
+
+class DiskStoreWriter:
+    """
+    Incremental writer for the disk layout, used by streaming ingestion.
+
+    Chunks are appended to the SQLite docstore batch by batch, so their text
+    is never held in memory; ``commit`` writes the vector index next to it
+    and renames both into place. With ``base`` the docstore starts as a
+    copy of an existing store (via the SQLite backup API).
+    """
+
+    def __init__(self, folder: Union[str, Path], index_name: str = "index", base: Optional[Path] = None):
+        self.folder = Path(folder)
+        self.index_name = index_name
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self._tmp_db = docstore_path(self.folder, index_name).with_suffix(".sqlite.tmp")
+        if self._tmp_db.exists():
+            self._tmp_db.unlink()
+        self._conn = sqlite3.connect(str(self._tmp_db))
+
+        if base is not None and has_disk_store(base, index_name):
+            source = sqlite3.connect(f"file:{docstore_path(base, index_name)}?mode=ro", uri=True)
+            try:
+                source.backup(self._conn)
+            finally:
+                source.close()
+        else:
+            _create_tables(self._conn)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS positions_doc_id ON positions (doc_id)")
+        (self.size,) = self._conn.execute("SELECT COUNT(*) FROM positions").fetchone()
+
+    def append(self, ids: Sequence[str], docs: Sequence[Document]) -> None:
+        """Store documents at the next index positions, in order."""
+        start = self.size
+        self._conn.executemany(
+            "INSERT INTO positions (pos, doc_id) VALUES (?, ?)",
+            ((start + offset, doc_id) for offset, doc_id in enumerate(ids)),
+        )
+        self._conn.executemany(
+            "INSERT INTO docs (id, content, metadata) VALUES (?, ?, ?)",
+            (
+                (doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+                for doc_id, doc in zip(ids, docs)
+            ),
+        )
+        self._conn.commit()
+        self.size += len(ids)
+
+    def remove(self, doc_ids: Sequence[str]) -> List[int]:
+        """
+        Delete documents and return their former positions. The remaining
+        positions are renumbered in order; ``index_factory.remove_positions``
+        compacts the vector index the same way (IVF labels included).
+        """
+        positions: List[int] = []
+        ids = list(doc_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            positions.extend(
+                pos for (pos,) in self._conn.execute(f"SELECT pos FROM positions WHERE doc_id IN ({marks})", chunk)
+            )
+            self._conn.execute(f"DELETE FROM positions WHERE doc_id IN ({marks})", chunk)
+            self._conn.execute(f"DELETE FROM docs WHERE id IN ({marks})", chunk)
+
+        if positions:
+            self._conn.execute("CREATE TEMP TABLE renumbered AS SELECT doc_id FROM positions ORDER BY pos")
+            self._conn.execute("DELETE FROM positions")
+            self._conn.execute("INSERT INTO positions (pos, doc_id) SELECT rowid - 1, doc_id FROM renumbered")
+            self._conn.execute("DROP TABLE renumbered")
+        self._conn.commit()
+
+        self.size -= len(positions)
+        return sorted(positions)
+
+    def commit(self, index) -> None:
+        if index.ntotal != self.size:
+            raise ValueError(f"Index holds {index.ntotal} vectors but the docstore has {self.size} positions")
+        self._conn.commit()
+        self._conn.close()
+        _install(index, self._tmp_db, self.folder, self.index_name)
+        log.info("FAISS disk store saved", path=str(self.folder), vectors=index.ntotal, mode="stream")
+
+    def abort(self) -> None:
+        self._conn.close()
+        self._tmp_db.unlink(missing_ok=True)
+
+
+def _docstore_items(vs):
+    docstore = vs.docstore
+    if hasattr(docstore, "all_items"):
+        return docstore.all_items()
+    return docstore._dict.items()
+
+
+def has_disk_store(folder: Union[str, Path], index_name: str = "index") -> bool:
+    return docstore_path(folder, index_name).exists() and faiss_path(folder, index_name).exists()
+
+
+def close_disk_store(vs) -> None:
+    """Release the idle SQLite connections of a store opened with ``mmap=True``."""
+    for part in (vs.docstore, vs.index_to_docstore_id):
+        if isinstance(part, (SqliteDocstore, SqliteIdMap)):
+            part.close()
+
+
+def load_disk_store(folder: Union[str, Path], embeddings, index_name: str = "index", *, mmap: bool = True):
+    """
+    Open a store written by ``save_disk_store``.
+
+    ``mmap=True`` is the serving mode: the index is memory-mapped read-only
+    and documents are read lazily from SQLite. ``mmap=False`` loads both
+    fully so FaissManager can mutate and re-save them.
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    index_file = str(faiss_path(folder, index_name))
+    db_path = docstore_path(folder, index_name)
+
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(index_file, flags | getattr(faiss, "IO_FLAG_MMAP_IFC", 0))
+        except RuntimeError:
+            # IVF inverted lists reject MMAP_IFC; plain MMAP maps them through the on-disk lists.
+            index = faiss.read_index(index_file, flags)
+        # One set of per-thread handles for both, so a reader thread holds a
+        # single connection to the snapshot.
+        db = _ReadOnlySqlite(db_path)
+        docstore = SqliteDocstore(db_path, db)
+        index_to_docstore_id = SqliteIdMap(db_path, db)
+    else:
+        index = faiss.read_index(index_file)
+        readonly, id_map = SqliteDocstore(db_path), SqliteIdMap(db_path)
+        try:
+            docstore = InMemoryDocstore(dict(readonly.all_items()))
+            index_to_docstore_id = dict(id_map.items())
+        finally:
+            readonly.close()
+            id_map.close()
+
+    log.info("FAISS disk store loaded", path=str(folder), mmap=mmap, vectors=index.ntotal)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+SUPPORTED_INDEX_TYPES = {"flat", "hnsw", "ivf", "ivf_pq", "auto"}
+
+# Scalar quantisation of the stored vectors; "none" keeps float32.
+SCALAR_QUANTIZERS = {"none": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+
+# IVF k-means wants roughly this many training points per centroid.
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def resolve_index_type(cfg: Dict[str, Any], n_vectors: int) -> str:
+    """Pick the concrete index type, applying the ``auto`` size threshold."""
+    index_type = cfg.get("type", "flat")
+    if index_type not in SUPPORTED_INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    if index_type == "auto":
+        threshold = cfg.get("auto_threshold", 50_000)
+        return cfg.get("auto_type", "hnsw") if n_vectors >= threshold else "flat"
+
+    return index_type
+
+
+def resolve_encoding(cfg: Dict[str, Any]) -> str:
+    encoding = cfg.get("quantization", "none")
+    if encoding not in SCALAR_QUANTIZERS:
+        raise ValueError(f"Unsupported vector quantization: {encoding}")
+    return encoding
+
+
+def _factory_string(index_type: str, dim: int, n_vectors: int, cfg: Dict[str, Any], encoding: str = "none") -> str:
+    codes = SCALAR_QUANTIZERS[encoding]
+    # RFlat keeps float32 copies and re-ranks the quantised shortlist exactly.
+    # HNSW (no remove_ids) and auto (flat -> approximate switch) are rebuilt
+    # from their own vectors, so they always keep the copies to rebuild from.
+    rebuilds = index_type == "hnsw" or cfg.get("type") == "auto"
+    rescore = cfg.get("rescore", {}).get("enabled", True) or rebuilds
+    refine = ",RFlat" if encoding != "none" and rescore else ""
+
+    if index_type == "flat":
+        return codes + refine
+
+    if index_type == "hnsw":
+        return f"HNSW{cfg.get('hnsw', {}).get('m', 32)},{codes}{refine}"
+
+    nlist = cfg.get("ivf", {}).get("nlist", 1024)
+    nlist = max(1, min(nlist, n_vectors // _MIN_POINTS_PER_CENTROID))
+
+    if index_type == "ivf":
+        return f"IVF{nlist},{codes}{refine}"
+
+    pq_cfg = cfg.get("pq", {})
+    code_size = pq_cfg.get("m", 48)
+    nbits = pq_cfg.get("nbits", 8)
+    if dim % code_size:
+        raise ValueError(f"PQ m={code_size} must divide embedding dimension {dim}")
+    return f"IVF{nlist},PQ{code_size}x{nbits}"
+
+
+def apply_search_params(index, cfg: Dict[str, Any]) -> None:
+    """Set query-time knobs (efSearch / nprobe / k_factor) that are not worth persisting."""
+    import faiss
+
+    base = _unwrap(index)
+    if base is not index:
+        index.k_factor = cfg.get("rescore", {}).get("k_factor", 4)
+
+    hnsw = getattr(base, "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = cfg.get("hnsw", {}).get("ef_search", 64)
+
+    try:
+        ivf = faiss.extract_index_ivf(base)
+    except RuntimeError:
+        return
+
+    ivf.nprobe = cfg.get("ivf", {}).get("nprobe", 16)
+    # Hashtable direct map keeps reconstruct() (used by MMR) and remove_ids() working.
+    _rebuild_direct_map(ivf, faiss.DirectMap.Hashtable)
+
+
+def _rebuild_direct_map(ivf, map_type) -> None:
+    """
+    (Re)build the id -> list entry map from the inverted lists. A map set
+    before ``add`` or saved that way stays empty, and remove_ids() then
+    silently removes nothing, so it is always rebuilt rather than trusted.
+    """
+    import faiss
+
+    ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    ivf.set_direct_map_type(map_type)
+
+
+def build_index(vectors, cfg: Dict[str, Any], index_type: Optional[str] = None, encoding: Optional[str] = None):
+    """Create, train (if needed) and fill a FAISS index from an (n, d) float32 array."""
+    import faiss
+    import numpy as np
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    index_type = index_type or resolve_index_type(cfg, n_vectors)
+    encoding = encoding or resolve_encoding(cfg)
+
+    factory = _factory_string(index_type, dim, n_vectors, cfg, encoding)
+    index = faiss.index_factory(dim, factory, faiss.METRIC_L2)
+
+    if index_type == "hnsw":
+        _unwrap(index).hnsw.efConstruction = cfg.get("hnsw", {}).get("ef_construction", 200)
+
+    if not index.is_trained:
+        sample_size = min(n_vectors, cfg.get("train_sample", 50_000))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(n_vectors, size=sample_size, replace=False)]
+        log.info("Training FAISS index", factory=factory, sample=sample_size)
+        index.train(sample)
+
+    index.add(vectors)
+    apply_search_params(index, cfg)
+
+    log.info("FAISS index built", factory=factory, vectors=n_vectors, dim=dim)
+    return index
+
+
+def _unwrap(index):
+    """The quantised base of a re-scoring (RFlat) index, else the index itself."""
+    import faiss
+
+    if isinstance(index, faiss.IndexRefine):
+        return faiss.downcast_index(index.base_index)
+    return index
+
+
+def index_kind(index) -> str:
+    import faiss
+
+    index = _unwrap(index)
+    if getattr(index, "hnsw", None) is not None:
+        return "hnsw"
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return "flat"
+    return "ivf_pq" if isinstance(ivf, faiss.IndexIVFPQ) else "ivf"
+
+
+def index_encoding(index) -> str:
+    """How vectors are stored for search: none (float32), fp16, int8 or pq."""
+    import faiss
+
+    codes = _unwrap(index)
+    if getattr(codes, "hnsw", None) is not None:
+        codes = faiss.downcast_index(codes.storage)
+    else:
+        try:
+            codes = faiss.downcast_index(faiss.extract_index_ivf(codes))
+        except RuntimeError:
+            pass
+
+    if isinstance(codes, faiss.IndexIVFPQ):
+        return "pq"
+    sq = getattr(codes, "sq", None)
+    if sq is None:
+        return "none"
+    return {faiss.ScalarQuantizer.QT_fp16: "fp16", faiss.ScalarQuantizer.QT_8bit: "int8"}.get(sq.qtype, "sq")
+
+
+def has_rescore(index) -> bool:
+    return _unwrap(index) is not index
+
+
+def index_bytes(index) -> Dict[str, int]:
+    """Serialised size of the searched codes and of the float32 re-scoring copies."""
+    import faiss
+
+    base = _unwrap(index)
+    if base is index:
+        return {"index_bytes": int(faiss.serialize_index(index).nbytes), "rescore_bytes": 0}
+    refine = faiss.downcast_index(index.refine_index)
+    return {
+        "index_bytes": int(faiss.serialize_index(base).nbytes),
+        "rescore_bytes": int(faiss.serialize_index(refine).nbytes),
+    }
+
+
+def has_exact_vectors(index) -> bool:
+    """Whether ``all_vectors`` gives back the original float32 vectors."""
+    return has_rescore(index) or index_encoding(index) == "none"
+
+
+def _rebuild_vectors(index):
+    """
+    The vectors to rebuild ``index`` from. Decoded fp16/int8/PQ codes would
+    be re-trained and re-quantised, compounding the error on every rebuild.
+    """
+    if not has_exact_vectors(index):
+        raise ValueError(
+            f"Cannot rebuild a {index_encoding(index)} {index_kind(index)} index without float32 copies; "
+            "re-ingest with vector_index.rescore.enabled"
+        )
+    return all_vectors(index)
+
+
+def all_vectors(index):
+    import numpy as np
+
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def create_vectorstore(texts: Sequence[str], metadatas: Sequence[dict], ids: List[str], embeddings, cfg: Dict[str, Any]):
+    """Embed once and wrap a configured (possibly trained) index in a LangChain FAISS store."""
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    vectors = np.asarray(embeddings.embed_documents(list(texts)), dtype=np.float32)
+    index = build_index(vectors, cfg)
+
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=metadata or {})
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def rebuild_index(vs, cfg: Dict[str, Any], index_type: Optional[str] = None, keep_positions: Optional[List[int]] = None) -> None:
+    """Rebuild ``vs.index`` in place from its own vectors (type switch or compaction)."""
+    vectors = _rebuild_vectors(vs.index)
+    ids = [vs.index_to_docstore_id[i] for i in range(len(vectors))]
+
+    if keep_positions is not None:
+        vectors = vectors[keep_positions]
+        ids = [ids[i] for i in keep_positions]
+
+    vs.index = build_index(vectors, cfg, index_type=index_type)
+    vs.index_to_docstore_id = dict(enumerate(ids))
+
+
+def _relabel_ivf(ivf, removed) -> None:
+    """Shift every label down by the number of removed positions below it."""
+    import faiss
+    import numpy as np
+
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if size == 0:
+            continue
+        ids_ptr = invlists.get_ids(list_no)
+        labels = faiss.rev_swig_ptr(ids_ptr, size)
+        labels -= np.searchsorted(removed, labels)
+        invlists.release_ids(list_no, ids_ptr)
+
+    # The direct map is keyed by label; rebuild it from the new ones.
+    _rebuild_direct_map(ivf, ivf.direct_map.type)
+
+
+def compact_in_place(index, positions: List[int]) -> bool:
+    """
+    Remove ``positions`` and renumber the rest 0..n-1 in order, which is what
+    ``FAISS.delete`` and the disk docstore assume. ``IndexIVF.remove_ids``
+    keeps the original labels, so IVF lists are relabelled afterwards.
+    Returns False, leaving the index untouched, if it cannot remove (HNSW).
+    """
+    import faiss
+    import numpy as np
+
+    removed = np.asarray(sorted(set(positions)), dtype=np.int64)
+    if len(removed) == 0:
+        return True
+
+    if has_rescore(index):
+        base = _unwrap(index)
+        if not compact_in_place(base, removed):
+            return False
+        faiss.downcast_index(index.refine_index).remove_ids(removed)
+        index.ntotal = base.ntotal
+        return True
+
+    kind = index_kind(index)
+    if kind == "hnsw":
+        return False
+    index.remove_ids(removed)
+    if kind != "flat":
+        _relabel_ivf(faiss.extract_index_ivf(index), removed)
+    return True
+
+
+def delete_ids(vs, ids: List[str], cfg: Dict[str, Any]) -> None:
+    """Delete docstore ids, compacting positions in order and rebuilding HNSW indexes."""
+    to_delete = set(ids)
+    positions = [pos for pos, doc_id in vs.index_to_docstore_id.items() if doc_id in to_delete]
+
+    if compact_in_place(vs.index, positions):
+        vs.index_to_docstore_id = dict(enumerate(
+            doc_id for _, doc_id in sorted(vs.index_to_docstore_id.items()) if doc_id not in to_delete
+        ))
+    else:
+        log.info("Index does not support removal, rebuilding without deleted ids", kind=index_kind(vs.index))
+        keep = sorted(set(vs.index_to_docstore_id) - set(positions))
+        rebuild_index(vs, cfg, index_type=index_kind(vs.index), keep_positions=keep)
+    vs.docstore.delete([doc_id for doc_id in ids if doc_id in vs.docstore._dict])
+
+
+def append_vectors(index, vectors, cfg: Dict[str, Any]):
+    """Add a batch to ``index``; a new stream starts flat and is converted by ``finish_stream``."""
+    import numpy as np
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if index is None:
+        # Exact until the end: quantiser ranges trained on one batch would clip later ones.
+        return build_index(vectors, cfg, index_type="flat", encoding="none")
+    index.add(vectors)
+    return index
+
+
+def remove_positions(index, positions: List[int], cfg: Dict[str, Any]):
+    """Drop vectors by position, compacting the rest in order like ``DiskStoreWriter.remove``."""
+    if compact_in_place(index, positions):
+        return index
+
+    log.info("Index does not support removal, rebuilding without deleted positions", kind=index_kind(index))
+    drop = set(positions)
+    keep = [pos for pos in range(index.ntotal) if pos not in drop]
+    return build_index(_rebuild_vectors(index)[keep], cfg, index_type=index_kind(index))
+
+
+def finish_stream(index, cfg: Dict[str, Any]):
+    """Convert a streamed flat index to the configured type and encoding once its final size is known."""
+    if index_kind(index) != "flat":
+        return index
+
+    target = resolve_index_type(cfg, index.ntotal)
+    encoding = resolve_encoding(cfg)
+    if target == "flat" and index_encoding(index) == encoding:
+        return index
+
+    if not has_exact_vectors(index):
+        log.warning("Streamed index has no float32 copies, keeping it as is", encoding=index_encoding(index))
+        return index
+
+    log.info("Converting streamed index", vectors=index.ntotal, target=target, encoding=encoding)
+    return build_index(all_vectors(index), cfg, index_type=target, encoding=encoding)
+
+
+def maybe_upgrade(vs, cfg: Dict[str, Any]) -> bool:
+    """Switch a flat index to the approximate type once it crosses the auto threshold."""
+    if cfg.get("type", "flat") != "auto" or index_kind(vs.index) != "flat":
+        return False
+
+    target = resolve_index_type(cfg, vs.index.ntotal)
+    if target == "flat":
+        return False
+    if not has_exact_vectors(vs.index):
+        log.warning("Index has no float32 copies to rebuild from, staying flat", encoding=index_encoding(vs.index))
+        return False
+
+    log.info("Index crossed auto threshold, switching type", vectors=vs.index.ntotal, target=target)
+    rebuild_index(vs, cfg, index_type=target)
+    return True
+
+
+def recall_at_k(index, k: int = 10, n_queries: int = 200, queries=None, reference_vectors=None) -> float:
+    """
+    Recall@k of ``index`` against an exact flat search over the same vectors.
+
+    For PQ indexes the stored vectors are lossy, so pass the original
+    embeddings as ``reference_vectors`` to include quantisation error.
+    """
+    import faiss
+    import numpy as np
+
+    vectors = all_vectors(index) if reference_vectors is None else np.asarray(reference_vectors, dtype=np.float32)
+    if len(vectors) == 0:
+        return 1.0
+
+    if queries is None:
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+
+    exact = faiss.IndexFlatL2(index.d)
+    exact.add(vectors)
+    k = min(k, len(vectors))
+
+    _, truth = exact.search(queries, k)
+    _, approx = index.search(queries, k)
+
+    hits = sum(len(set(t) & set(a)) for t, a in zip(truth, approx))
+    return hits / float(truth.size)
+
+
+def quantization_report(
+    vectors,
+    cfg: Dict[str, Any],
+    *,
+    index_type: Optional[str] = None,
+    k: int = 10,
+    n_queries: int = 200,
+) -> List[Dict[str, Any]]:
+    """
+    Memory and recall@k of each vector encoding against the float32 baseline.
+
+    Every variant is built from the same exact ``vectors`` and scored
+    against an exact flat search over them, so quantisation error is
+    included. ``index_bytes`` is what a query scans; ``rescore_bytes`` are
+    the float32 copies of which only the shortlist is read.
+    """
+    import numpy as np
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if len(vectors) == 0:
+        return []
+    index_type = index_type or resolve_index_type(cfg, len(vectors))
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+
+    rows: List[Dict[str, Any]] = []
+    seen = set()
+    for encoding, rescore in (("none", False), ("fp16", False), ("fp16", True), ("int8", False), ("int8", True)):
+        variant = {
+            **cfg,
+            "type": index_type,
+            "quantization": encoding,
+            "rescore": {**cfg.get("rescore", {}), "enabled": rescore},
+        }
+
+        start = time.perf_counter()
+        index = build_index(vectors, variant, index_type=index_type)
+        build_s = time.perf_counter() - start
+
+        # HNSW always keeps the float32 copies, so its no-rescore variants collapse.
+        rescore = has_rescore(index)
+        if (encoding, rescore) in seen:
+            continue
+        seen.add((encoding, rescore))
+
+        start = time.perf_counter()
+        index.search(queries, k)
+        search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        rows.append({
+            "encoding": encoding,
+            "rescore": rescore,
+            **index_bytes(index),
+            "recall": round(recall_at_k(index, k=k, queries=queries, reference_vectors=vectors), 4),
+            "build_s": round(build_s, 3),
+            "search_ms": round(search_ms, 4),
+        })
+
+    baseline = rows[0]["index_bytes"]
+    for row in rows:
+        row["index_saved"] = round(1 - row["index_bytes"] / baseline, 3)
+    return rows
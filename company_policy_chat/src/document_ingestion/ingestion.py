@@ -1,83 +1,443 @@
 from __future__ import annotations
 
+import functools
+import uuid
 from pathlib import Path
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 
 from company_policy_chat.utils.model_loader import ModelLoader
+from company_policy_chat.utils.registry import get_registry
 from company_policy_chat.logger.custom_logger import CustomLogger
 from company_policy_chat.utils.config_loader import load_config
+from company_policy_chat.utils.metrics import span
 from company_policy_chat.utils.file_utils import (
-    save_uploaded_files,
+    stream_uploaded_files,
     load_documents,
+    iter_pages,
 )
+from company_policy_chat.src.document_ingestion.manifest import IngestionManifest
+from company_policy_chat.src.document_ingestion.lexical_index import LexicalIndex
+from company_policy_chat.src.document_ingestion import disk_store, index_factory, snapshots
 
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
 
 
-config = load_config()
 log = CustomLogger().get_logger(__name__)
 
 
-class FaissManager:
-    """Handles creation, loading, and incremental updates of FAISS index."""
+def _exclusive(method: Callable) -> Callable:
+    """Run a FaissManager write under the index's writer lock, on the latest snapshot."""
+
+    @functools.wraps(method)
+    def wrapper(self: "FaissManager", *args, **kwargs):
+        with snapshots.writer_lock(self.index_dir):
+            self._refresh()
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
-    def __init__(self, index_dir: Path, model_loader: ModelLoader):
-        self.index_dir = index_dir
-        self.embeddings = model_loader.load_embedding()
+
+class FaissManager:
+    """Handles creation, loading, and incremental updates of FAISS index.
+
+    Reads come from the currently published snapshot; every write goes to a
+    fresh snapshot directory that is published atomically in ``_persist``.
+    Writes hold ``snapshots.writer_lock`` from loading their base snapshot
+    until publishing, so concurrent writers to one index run one at a time.
+    """
+
+    def __init__(self, index_dir: Path, model_loader: Optional[ModelLoader] = None):
+        self.index_dir = Path(index_dir)
+        self.read_dir = snapshots.resolve(self.index_dir)
+        self.embeddings = (
+            model_loader.load_embedding() if model_loader else get_registry().get_embeddings()
+        )
         self.vs: FAISS | None = None
+        self.manifest = IngestionManifest(self.read_dir)
+        self.lexical = LexicalIndex(self.read_dir, read_only=True)
+        self.index_cfg = load_config().get("vector_index", {})
+        self.snapshot_cfg = load_config().get("snapshots", {})
+        self._staging: Optional[Path] = None
 
     @property
     def index_path(self) -> Path:
-        return self.index_dir / "index.faiss"
+        return self.read_dir / "index.faiss"
 
-    def load_or_create(self, docs: List[Document]) -> FAISS:
-        """Load an existing FAISS index or create/update it with new documents."""
+    def pending_sources(self, hashes: Dict[str, str]) -> List[str]:
+        """Return the sources whose content hash differs from the manifest."""
+        if not self.index_path.exists():
+            return list(hashes)
 
-        if self.index_path.exists():
-            log.info("Loading existing FAISS index", path=str(self.index_dir))
+        self._ensure_manifest()
+        return [
+            source for source, content_hash in hashes.items()
+            if not self.manifest.is_unchanged(source, content_hash)
+        ]
 
-            self.vs = FAISS.load_local(
-                folder_path=str(self.index_dir),
-                embeddings=self.embeddings,
-                allow_dangerous_deserialization=True,
-            )
+    def load(self) -> FAISS:
+        from langchain_community.vectorstores import FAISS
+
+        if self.vs is None:
+            log.info("Loading existing FAISS index", path=str(self.read_dir))
+            if disk_store.has_disk_store(self.read_dir):
+                self.vs = disk_store.load_disk_store(self.read_dir, self.embeddings, mmap=False)
+            else:
+                # Legacy index.pkl layout; rewritten as a disk store on the next save.
+                self.vs = FAISS.load_local(
+                    folder_path=str(self.read_dir),
+                    embeddings=self.embeddings,
+                    allow_dangerous_deserialization=True,
+                )
+            index_factory.apply_search_params(self.vs.index, self.index_cfg)
+        return self.vs
 
-            self._add_new_documents(docs)
+    @_exclusive
+    def load_or_create(
+        self,
+        docs: List[Document],
+        hashes: Optional[Dict[str, str]] = None,
+    ) -> FAISS:
+        """Load an existing FAISS index or create/update it with new documents."""
+
+        hashes = hashes or {}
+        grouped = self._group_by_source(docs)
+
+        if self.index_path.exists():
+            self.load()
+            self._ensure_manifest()
+            self._stage()
+            self._ensure_lexical()
+            self._upsert_sources(grouped, hashes)
 
         else:
             log.info("Creating new FAISS index", path=str(self.index_dir))
 
-            self.vs = FAISS.from_documents(docs, self.embeddings)
-            self.vs.save_local(str(self.index_dir))
+            self._stage()
+            self.manifest.clear()
+            ids = self._assign_ids(grouped, hashes)
+            ordered = self._docs_in_order(grouped)
+            self.vs = index_factory.create_vectorstore(
+                [doc.page_content for doc in ordered],
+                [doc.metadata for doc in ordered],
+                ids,
+                self.embeddings,
+                self.index_cfg,
+            )
+            self.lexical.clear()
+            self.lexical.add((doc_id, doc.page_content) for doc_id, doc in zip(ids, ordered))
+            self._persist()
 
         return self.vs
 
-    def _add_new_documents(self, docs: List[Document]) -> None:
-        
-        existing_sources = set()
+    @_exclusive
+    def stream_upsert(
+        self,
+        batches: Iterable[Tuple[List[Document], Sequence[Sequence[float]]]],
+        hashes: Optional[Dict[str, str]] = None,
+        exclude: Optional[Callable[[], Iterable[str]]] = None,
+    ) -> int:
+        """
+        Append pre-embedded ``(chunks, vectors)`` batches with bounded memory.
+
+        Chunk text goes straight into the staged SQLite docstore and vectors
+        into the FAISS index one batch at a time; the existing corpus is
+        never loaded into an in-memory docstore. Previous chunks of every
+        streamed source are removed in one pass at the end, together with the
+        new chunks of any source returned by ``exclude`` (e.g. a file that
+        failed halfway), which keeps its previously indexed version. Always
+        writes the disk layout. Returns the number of chunks indexed.
+        """
+        import faiss
+
+        hashes = hashes or {}
+        has_index = self.index_path.exists()
+        base: Optional[Path] = self.read_dir if has_index else None
+
+        self._ensure_manifest()
+        self._stage()
+        if has_index and not disk_store.has_disk_store(self.read_dir):
+            # Legacy pickle layout: convert once, then stream on top of it.
+            self.load()
+            self._ensure_lexical()
+            disk_store.save_disk_store(self.vs, self._staging)
+            base = self._staging
+        elif has_index and not self.lexical.exists():
+            self.load()
+            self._ensure_lexical()
+
+        index = self.vs.index if self.vs is not None else (
+            faiss.read_index(str(self.index_path)) if has_index else None
+        )
+        self.vs = None
+        writer = disk_store.DiskStoreWriter(self._staging, base=base)
+        unchanged = {source for source, h in hashes.items() if self.manifest.is_unchanged(source, h)}
+        new_ids: Dict[str, List[str]] = {}
+
+        try:
+            for docs, vectors in batches:
+                keep = [i for i, doc in enumerate(docs) if doc.metadata.get("source", "unknown") not in unchanged]
+                if not keep:
+                    continue
+                docs = [docs[i] for i in keep]
+                ids = [str(uuid.uuid4()) for _ in docs]
+
+                index = index_factory.append_vectors(index, [vectors[i] for i in keep], self.index_cfg)
+                writer.append(ids, docs)
+                self.lexical.add((doc_id, doc.page_content) for doc_id, doc in zip(ids, docs))
+                for doc_id, doc in zip(ids, docs):
+                    new_ids.setdefault(doc.metadata.get("source", "unknown"), []).append(doc_id)
+
+            dropped: Set[str] = set(exclude()) if exclude else set()
+            removed_ids = [doc_id for source in dropped for doc_id in new_ids.pop(source, [])]
+            for source in new_ids:
+                removed_ids.extend(self.manifest.remove(source))
+
+            if not new_ids:
+                log.info("No new chunks streamed — index is up to date")
+                writer.abort()
+                self._unstage()
+                return 0
+
+            if removed_ids:
+                index = index_factory.remove_positions(index, writer.remove(removed_ids), self.index_cfg)
+                self.lexical.remove(removed_ids)
+            for source, ids in new_ids.items():
+                self.manifest.record(source, hashes.get(source), ids)
+
+            index = index_factory.finish_stream(index, self.index_cfg)
+            index_factory.apply_search_params(index, self.index_cfg)
+        except BaseException:
+            writer.abort()
+            self._unstage()
+            raise
+
+        indexed = sum(len(ids) for ids in new_ids.values())
+        self._publish(writer.commit, index, storage="disk", vectors=index.ntotal, mode="stream")
+        log.info("Streamed chunks indexed", chunks=indexed, sources=len(new_ids), replaced=len(removed_ids))
+        return indexed
+
+    @_exclusive
+    def remove_sources(self, sources: Iterable[str]) -> int:
+        """Delete every chunk belonging to the given sources from the index."""
+        if not self.index_path.exists():
+            return 0
+
+        self.load()
+        self._ensure_manifest()
+        self._stage()
+        self._ensure_lexical()
+
+        stale_ids: List[str] = []
+        removed = 0
+        for source in sources:
+            ids = self.manifest.remove(source)
+            if ids:
+                stale_ids.extend(ids)
+                removed += 1
+
+        if not stale_ids:
+            log.info("No indexed chunks found for sources to remove")
+            self._unstage()
+            return 0
+
+        index_factory.delete_ids(self.vs, stale_ids, self.index_cfg)
+        self.lexical.remove(stale_ids)
+        self._persist()
+
+        log.info("Sources removed from FAISS", sources=removed, chunks=len(stale_ids))
+        return removed
+
+    @_exclusive
+    def purge_missing(self) -> int:
+        """Remove sources whose backing file no longer exists on disk."""
+        self._ensure_manifest()
+        missing = [s for s in self.manifest.sources() if not Path(s).exists()]
+        return self.remove_sources(missing) if missing else 0
+
+    def recall_report(self, k: int = 10, n_queries: int = 200) -> dict:
+        """Recall@k of the configured index against exact search on the same vectors."""
+        self.load()
+        recall = index_factory.recall_at_k(self.vs.index, k=k, n_queries=n_queries)
+        report = {
+            "index_type": index_factory.index_kind(self.vs.index),
+            "encoding": index_factory.index_encoding(self.vs.index),
+            "rescore": index_factory.has_rescore(self.vs.index),
+            "vectors": self.vs.index.ntotal,
+            "k": k,
+            "recall": recall,
+            **index_factory.index_bytes(self.vs.index),
+        }
+        log.info("FAISS recall report", **report)
+        return report
+
+    def quantization_report(self, k: int = 10, n_queries: int = 200) -> dict:
+        """Memory saved and recall@k of fp16 / int8 storage versus float32, on this index's vectors."""
+        self.load()
+        index = self.vs.index
+        # Without re-scoring copies, a quantised index can only give back decoded vectors.
+        exact = index_factory.index_encoding(index) == "none" or index_factory.has_rescore(index)
+        if not exact:
+            log.warning("Quantization report baseline is decoded from a lossy index")
+
+        report = {
+            "index_type": index_factory.index_kind(index),
+            "current_encoding": index_factory.index_encoding(index),
+            "vectors": index.ntotal,
+            "k": k,
+            "exact_baseline": exact,
+            "variants": index_factory.quantization_report(
+                index_factory.all_vectors(index),
+                self.index_cfg,
+                index_type=index_factory.index_kind(index),
+                k=k,
+                n_queries=n_queries,
+            ),
+        }
+        log.info("FAISS quantization report", **report)
+        return report
+
+    def _ensure_manifest(self) -> None:
+        if self.manifest.exists() or not self.index_path.exists():
+            return
 
-        if self.vs and self.vs.docstore:
-            for doc in self.vs.docstore._dict.values():
-                source = doc.metadata.get("source")
-                if source:
-                    existing_sources.add(source)
-                    
+        # Published snapshots are immutable; the manifest is written with the next one.
+        self.load()
+        self.manifest.bootstrap_from_docstore(self.vs.index_to_docstore_id, self.vs.docstore)
 
-        new_docs = [
-            doc for doc in docs
-            if doc.metadata.get("source") not in existing_sources
-        ]
+    def _ensure_lexical(self) -> None:
+        """Build the BM25 index once for stores created before it existed."""
+        if self.lexical.exists():
+            return
 
-        if not new_docs:
+        log.info("Building lexical index from existing docstore", path=str(self.lexical.path))
+        docs = (
+            (doc_id, self.vs.docstore.search(doc_id))
+            for doc_id in self.vs.index_to_docstore_id.values()
+        )
+        self.lexical.add((doc_id, doc.page_content) for doc_id, doc in docs if isinstance(doc, Document))
+
+    @staticmethod
+    def _group_by_source(docs: List[Document]) -> Dict[str, List[Document]]:
+        grouped: Dict[str, List[Document]] = {}
+        for doc in docs:
+            grouped.setdefault(doc.metadata.get("source", "unknown"), []).append(doc)
+        return grouped
+
+    @staticmethod
+    def _docs_in_order(grouped: Dict[str, List[Document]]) -> List[Document]:
+        return [doc for source_docs in grouped.values() for doc in source_docs]
+
+    def _assign_ids(
+        self,
+        grouped: Dict[str, List[Document]],
+        hashes: Dict[str, str],
+    ) -> List[str]:
+        ids: List[str] = []
+        for source, source_docs in grouped.items():
+            source_ids = [str(uuid.uuid4()) for _ in source_docs]
+            self.manifest.record(source, hashes.get(source), source_ids)
+            ids.extend(source_ids)
+        return ids
+
+    def _upsert_sources(
+        self,
+        grouped: Dict[str, List[Document]],
+        hashes: Dict[str, str],
+    ) -> None:
+        grouped = {
+            source: source_docs for source, source_docs in grouped.items()
+            if source not in hashes or not self.manifest.is_unchanged(source, hashes[source])
+        }
+
+        if not grouped:
             log.info("No new documents to add — index is up to date")
+            self._unstage()
             return
 
-        log.info("Adding new documents to FAISS", count=len(new_docs))
-        self.vs.add_documents(new_docs)
-        self.vs.save_local(str(self.index_dir))
+        stale_ids: List[str] = []
+        for source in grouped:
+            stale_ids.extend(self.manifest.remove(source))
+
+        if stale_ids:
+            log.info("Removing outdated chunks from FAISS", count=len(stale_ids))
+            index_factory.delete_ids(self.vs, stale_ids, self.index_cfg)
+            self.lexical.remove(stale_ids)
+
+        ids = self._assign_ids(grouped, hashes)
+        ordered = self._docs_in_order(grouped)
+        log.info("Adding new documents to FAISS", count=len(ids), sources=len(grouped))
+        self.vs.add_documents(ordered, ids=ids)
+        self.lexical.add((doc_id, doc.page_content) for doc_id, doc in zip(ids, ordered))
+        index_factory.maybe_upgrade(self.vs, self.index_cfg)
+        self._persist()
+
+    def _refresh(self) -> None:
+        """Drop state read from a snapshot that another writer has since replaced."""
+        read_dir = snapshots.resolve(self.index_dir)
+        if read_dir == self.read_dir:
+            return
+        log.info("Index changed since it was read, reloading", old=str(self.read_dir), new=str(read_dir))
+        self.lexical.close()
+        self.read_dir = read_dir
+        self.vs = None
+        self.manifest = IngestionManifest(read_dir)
+        self.lexical = LexicalIndex(read_dir, read_only=True)
+
+    def _stage(self) -> None:
+        """Open an unpublished snapshot and move lexical writes onto a copy in it."""
+        if self._staging is not None:
+            return
+        self._staging = snapshots.new_snapshot(self.index_dir)
+        base, self.lexical = self.lexical, self.lexical.copy_to(self._staging)
+        base.close()
+
+    def _unstage(self) -> None:
+        """Drop the staged snapshot when there turned out to be nothing to write."""
+        if self._staging is None:
+            return
+        self.lexical.close()
+        snapshots.discard(self._staging)
+        self._staging = None
+        self.lexical = LexicalIndex(self.read_dir, read_only=True)
+
+    def _persist(self) -> None:
+        storage = self.index_cfg.get("storage", "disk")
+        self._publish(self._save_vectorstore, storage, storage=storage, vectors=self.vs.index.ntotal)
+
+    def _save_vectorstore(self, storage: str) -> None:
+        if storage == "disk":
+            disk_store.save_disk_store(self.vs, self._staging)
+        else:
+            self.vs.save_local(str(self._staging))
+
+    def _publish(self, write: Callable, *args, **fields) -> None:
+        """Run ``write(*args)`` into the staged snapshot, then publish it atomically."""
+        staging = self._staging
+        with span("ingest_write", **fields):
+            try:
+                write(*args)
+                self.lexical.close()
+                self.manifest.index_dir = staging
+                self.manifest.save()
+                snapshots.publish(self.index_dir, staging)
+            except Exception:
+                self.lexical.close()
+                snapshots.discard(staging)
+                raise
+            finally:
+                self._staging = None
+
+        self.read_dir = staging
+        self.lexical = LexicalIndex(staging, read_only=True)
+        snapshots.collect_garbage(
+            self.index_dir,
+            retention_s=self.snapshot_cfg.get("retention_s", 3600),
+            keep=self.snapshot_cfg.get("keep", 1),
+        )
+
 
 class Ingestion:
     
@@ -86,9 +446,16 @@ class Ingestion:
         self,
         temp_base: str = "data",
         faiss_base: str = "faiss_index",
+        loader_workers: Optional[int] = None,
     ):
         try:
-            self.model_loader = ModelLoader()
+            self.model_loader = get_registry().get_model_loader()
+
+            ingestion_cfg = load_config().get("ingestion", {})
+            self.loader_workers = loader_workers or ingestion_cfg.get("loader_workers", 1)
+            self.pages_per_task = ingestion_cfg.get("pdf_pages_per_task", 25)
+            self.upload_workers = ingestion_cfg.get("upload_workers", 1)
+            self.stream_batch_size = ingestion_cfg.get("stream_batch_size", 256)
 
             self.temp_base = Path(temp_base).resolve()
             self.temp_base.mkdir(parents=True, exist_ok=True)
@@ -100,12 +467,33 @@ class Ingestion:
                 "Ingestion initialized",
                 temp_dir=str(self.temp_base),
                 faiss_dir=str(self.faiss_base),
+                loader_workers=self.loader_workers,
             )
 
         except Exception as e:
             log.error("Failed to initialize Ingestion", error=str(e))
             raise RuntimeError("Ingestion initialization failed") from e
 
+    def _collection_dirs(self, collection: Optional[str]):
+        if not collection:
+            return self.temp_base, self.faiss_base
+
+        if Path(collection).name != collection or collection.startswith("."):
+            raise ValueError(f"Invalid collection name: {collection}")
+
+        return self.temp_base / collection, self.faiss_base / collection
+
+    @staticmethod
+    def _make_splitter(chunk_size: int, chunk_overlap: int):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        # start_index lets retrieval stitch overlapping neighbours back together.
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+
     def _split_documents(
         self,
         docs: List[Document],
@@ -113,12 +501,7 @@ class Ingestion:
         chunk_size: int,
         chunk_overlap: int,
     ) -> List[Document]:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-        )
-
-        chunks = splitter.split_documents(docs)
+        chunks = self._make_splitter(chunk_size, chunk_overlap).split_documents(docs)
 
         log.info(
             "Documents split into chunks",
@@ -135,41 +518,163 @@ class Ingestion:
         *,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
+        collection: Optional[str] = None,
     ) -> FAISS:
-       
+        """Ingest uploads into the default index, or into a named collection shard.
+
+        Each collection lives in its own sub-directory of ``faiss_base`` with
+        its own manifest, so re-ingesting one never touches the others.
+        """
 
         try:
+            temp_dir, index_dir = self._collection_dirs(collection)
+
+            with span("ingest_save", collection=collection) as fields:
+                saved = stream_uploaded_files(
+                    uploaded_files,
+                    temp_dir,
+                    workers=self.upload_workers,
+                )
+                fields["files"] = len(saved)
+                fields["bytes"] = sum(item.size for item in saved)
+            paths = [item.path for item in saved]
+
+            faiss_manager = FaissManager(index_dir=index_dir)
+
             
-            paths = save_uploaded_files(uploaded_files, self.temp_base)
+            hashes = {str(item.path): item.sha256 for item in saved}
+            pending = set(faiss_manager.pending_sources(hashes))
+
+            if hashes and not pending:
+                log.info("All uploaded files unchanged — skipping ingestion", files=len(hashes))
+                return faiss_manager.load()
 
             
-            docs = load_documents(paths)
+            with span("ingest_load", files=len(pending)) as fields:
+                docs = load_documents(
+                    [path for path in paths if str(path) in pending],
+                    workers=self.loader_workers,
+                    pages_per_task=self.pages_per_task,
+                )
+                fields["pages"] = len(docs)
             if not docs:
                 raise ValueError("No valid documents could be loaded")
 
             
-            chunks = self._split_documents(
-                docs,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
+            with span("ingest_split", pages=len(docs)) as fields:
+                chunks = self._split_documents(
+                    docs,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                )
+                fields["chunks"] = len(chunks)
+
+            # Includes embedding (timed separately as embed_documents) and the write.
+            with span("ingest_index", chunks=len(chunks)):
+                vs = faiss_manager.load_or_create(chunks, hashes)
+
+            log.info(
+                "FAISS index ready",
+                total_chunks=len(chunks),
+                index_path=str(index_dir),
+                collection=collection,
             )
 
-            
-            faiss_manager = FaissManager(
-                index_dir=self.faiss_base,
-                model_loader=self.model_loader,
+            return vs
+
+        except Exception as e:
+            log.error("Failed to build FAISS index", error=str(e))
+            raise
+
+    def stream_index(
+        self,
+        uploaded_files: Iterable,
+        *,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        collection: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """Bounded-memory variant of ``build_index`` for very large documents.
+
+        Pages are read lazily, split and embedded ``batch_size`` chunks at a
+        time and appended to the index as they are produced, so peak memory
+        does not grow with the corpus. Returns the number of chunks indexed.
+        """
+        try:
+            temp_dir, index_dir = self._collection_dirs(collection)
+            batch_size = batch_size or self.stream_batch_size
+
+            with span("ingest_save", collection=collection) as fields:
+                saved = stream_uploaded_files(uploaded_files, temp_dir, workers=self.upload_workers)
+                fields["files"] = len(saved)
+                fields["bytes"] = sum(item.size for item in saved)
+
+            faiss_manager = FaissManager(index_dir=index_dir)
+            hashes = {str(item.path): item.sha256 for item in saved}
+            pending = set(faiss_manager.pending_sources(hashes))
+            if not pending:
+                log.info("All uploaded files unchanged — skipping ingestion", files=len(hashes))
+                return 0
+
+            failed: Set[str] = set()
+            pages = iter_pages(
+                [item.path for item in saved if str(item.path) in pending],
+                on_error=lambda path, error: failed.add(str(path)),
+            )
+            batches = self._embedded_batches(
+                pages,
+                self._make_splitter(chunk_size, chunk_overlap),
+                faiss_manager.embeddings,
+                batch_size,
             )
 
-            vs = faiss_manager.load_or_create(chunks)
+            with span("ingest_stream", files=len(pending), batch_size=batch_size) as fields:
+                indexed = faiss_manager.stream_upsert(batches, hashes, exclude=lambda: failed)
+                fields["chunks"] = indexed
+                fields["files_failed"] = len(failed)
+
+            if failed and len(failed) == len(pending):
+                raise ValueError("No valid documents could be loaded")
 
             log.info(
                 "FAISS index ready",
-                total_chunks=len(chunks),
-                index_path=str(self.faiss_base),
+                total_chunks=indexed,
+                index_path=str(index_dir),
+                collection=collection,
+                mode="stream",
             )
+            return indexed
 
-            return vs
+        except Exception as e:
+            log.error("Failed to stream FAISS index", error=str(e))
+            raise
+
+    @staticmethod
+    def _embedded_batches(
+        pages: Iterable[Document],
+        splitter,
+        embeddings,
+        batch_size: int,
+    ) -> Iterator[Tuple[List[Document], List[List[float]]]]:
+        batch: List[Document] = []
+        for page in pages:
+            batch.extend(splitter.split_documents([page]))
+            while len(batch) >= batch_size:
+                head, batch = batch[:batch_size], batch[batch_size:]
+                yield head, embeddings.embed_documents([doc.page_content for doc in head])
+        if batch:
+            yield batch, embeddings.embed_documents([doc.page_content for doc in batch])
+
+    def remove_documents(self, filenames: Iterable[str], collection: Optional[str] = None) -> int:
+        """Purge previously ingested files from the index by file name."""
+        try:
+            temp_dir, index_dir = self._collection_dirs(collection)
+            sources = [str(temp_dir / Path(name).name) for name in filenames]
+
+            faiss_manager = FaissManager(index_dir=index_dir)
+            return faiss_manager.remove_sources(sources)
 
         except Exception as e:
-            log.error("Failed to build FAISS index", error=str(e))
+            log.error("Failed to remove documents from FAISS index", error=str(e))
             raise
@@ -0,0 +1,432 @@
+"""
+Background ingestion jobs.
+
+``IngestionService.submit`` persists the uploads and returns immediately with
+an ``IngestionJob``; a worker pool runs the job as a pipeline of stage threads
+joined by bounded queues:
+
+    load (iter_documents) -> split -> embed (batched) -> index (FaissManager)
+
+so parsing, chunking and embedding overlap instead of running back to back,
+and a slow stage applies back-pressure instead of letting the queues grow.
+The index stage appends each embedded batch as it arrives
+(``FaissManager.stream_upsert``), so a job's memory does not grow with its
+size. A file that fails to load or embed is recorded on the job and left out
+of the index; the rest of the batch is still published.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+from company_policy_chat.utils.config_loader import load_config
+from company_policy_chat.utils.file_utils import SavedFile, iter_documents, stream_uploaded_files
+from company_policy_chat.utils.metrics import get_metrics, span
+from company_policy_chat.src.document_ingestion import snapshots
+from company_policy_chat.src.document_ingestion.ingestion import FaissManager, Ingestion
+
+log = CustomLogger().get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+_DONE = object()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's pipeline once it has been cancelled or a stage failed."""
+
+
+@dataclass
+class IngestionJob:
+    """Status and progress of one ingestion job; counters are updated live."""
+
+    id: str
+    collection: Optional[str]
+    files: List[str]
+    status: str = QUEUED
+    files_total: int = 0
+    files_skipped: int = 0
+    files_loaded: int = 0
+    files_failed: int = 0
+    pages: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    indexed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _finished: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation; takes effect until the final snapshot is published."""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def fail_file(self, path: str, error: str) -> None:
+        with self._lock:
+            if path not in self.errors:
+                self.errors[path] = error
+                self.files_failed += 1
+
+    def failed_sources(self) -> set:
+        with self._lock:
+            return set(self.errors)
+
+    def _start(self) -> None:
+        with self._lock:
+            self.status = RUNNING
+            self.started_at = time.time()
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+        self._finished.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "collection": self.collection,
+                "status": self.status,
+                "files_total": self.files_total,
+                "files_skipped": self.files_skipped,
+                "files_loaded": self.files_loaded,
+                "files_failed": self.files_failed,
+                "pages": self.pages,
+                "chunks": self.chunks,
+                "embedded": self.embedded,
+                "indexed": self.indexed,
+                "errors": dict(self.errors),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class IngestionService:
+    """
+    Runs ingestion jobs on a worker pool.
+
+    Jobs for different collections run concurrently; jobs for the same index
+    directory are serialised by ``snapshots.writer_lock``, across processes
+    too, since each one publishes a snapshot built from the previous one.
+    Finished jobs stay queryable for ``finished_ttl_s`` and at most
+    ``max_finished`` of them are kept.
+    """
+
+    def __init__(
+        self,
+        ingestion: Optional[Ingestion] = None,
+        *,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        finished_ttl_s: Optional[float] = None,
+        max_finished: Optional[int] = None,
+    ):
+        jobs_cfg = load_config().get("ingestion", {}).get("jobs", {})
+        self.ingestion = ingestion or Ingestion()
+        self.queue_size = queue_size or jobs_cfg.get("queue_size", 8)
+        self.embed_batch_size = embed_batch_size or jobs_cfg.get("embed_batch_size", 64)
+        self.finished_ttl_s = finished_ttl_s or jobs_cfg.get("finished_ttl_s", 3600)
+        self.max_finished = max_finished or jobs_cfg.get("max_finished", 1000)
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or jobs_cfg.get("workers", 2),
+            thread_name_prefix="ingest-job",
+        )
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    # ----- public API ------------------------------------------------------
+
+    def submit(
+        self,
+        uploaded_files: Iterable,
+        *,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        collection: Optional[str] = None,
+    ) -> IngestionJob:
+        """Persist the uploads now (callers may close them on return) and queue the job."""
+        temp_dir, index_dir = self.ingestion._collection_dirs(collection)
+        saved = stream_uploaded_files(uploaded_files, temp_dir, workers=self.ingestion.upload_workers)
+
+        job = IngestionJob(
+            id=uuid.uuid4().hex,
+            collection=collection,
+            files=[str(item.path) for item in saved],
+            files_total=len(saved),
+        )
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+        self._pool.submit(self._run, job, saved, index_dir, chunk_size, chunk_overlap)
+        log.info("Ingestion job queued", job_id=job.id, files=len(saved), collection=collection)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestionJob]:
+        with self._lock:
+            self._prune()
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.status in FINAL_STATES:
+            return False
+        job.cancel()
+        log.info("Ingestion job cancellation requested", job_id=job_id)
+        return True
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        if cancel_pending:
+            for job in self.jobs():
+                if job.status not in FINAL_STATES:
+                    job.cancel()
+        self._pool.shutdown(wait=wait)
+
+    def _prune(self) -> None:
+        """Forget finished jobs past the TTL or beyond the cap, oldest first; the caller holds ``_lock``."""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at,
+        )
+        expired = time.time() - self.finished_ttl_s
+        excess = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i >= excess and job.finished_at >= expired:
+                break
+            del self._jobs[job.id]
+
+    # ----- job execution ---------------------------------------------------
+
+    def _run(
+        self,
+        job: IngestionJob,
+        saved: List[SavedFile],
+        index_dir: Path,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> None:
+        if job.cancelled:
+            job._finish(CANCELLED)
+            get_metrics().inc("ingest_jobs_total", labels={"status": CANCELLED})
+            return
+
+        job._start()
+        try:
+            with snapshots.writer_lock(index_dir), span("ingest_job", job_id=job.id, collection=job.collection) as fields:
+                self._pipeline(job, saved, index_dir, chunk_size, chunk_overlap)
+                fields.update(chunks=job.chunks, files_failed=job.files_failed)
+
+            if job.files_failed and job.files_failed == job.files_total:
+                job._finish(FAILED, "every file failed to load")
+            else:
+                job._finish(SUCCEEDED)
+
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            log.error("Ingestion job failed", job_id=job.id, error=str(e))
+            job._finish(FAILED, str(e))
+
+        get_metrics().inc("ingest_jobs_total", labels={"status": job.status})
+        log.info("Ingestion job finished", **job.to_dict())
+
+    def _pipeline(
+        self,
+        job: IngestionJob,
+        saved: List[SavedFile],
+        index_dir: Path,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> None:
+        manager = FaissManager(index_dir=index_dir)
+        hashes = {str(item.path): item.sha256 for item in saved}
+        pending = set(manager.pending_sources(hashes))
+        job.add(files_skipped=len(hashes) - len(pending))
+        if not pending:
+            log.info("All uploaded files unchanged — nothing to ingest", job_id=job.id)
+            return
+
+        paths = [item.path for item in saved if str(item.path) in pending]
+        to_split: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        to_embed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        to_index: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        failures: List[BaseException] = []
+
+        threads = [
+            self._spawn("load", self._load_stage, job, stop, failures, paths, to_split),
+            self._spawn("split", self._split_stage, job, stop, failures, to_split, to_embed, chunk_size, chunk_overlap),
+            self._spawn("embed", self._embed_stage, job, stop, failures, manager, to_embed, to_index),
+        ]
+        try:
+            with span("ingest_index") as fields:
+                indexed = manager.stream_upsert(
+                    self._drain(job, stop, to_index),
+                    hashes,
+                    exclude=job.failed_sources,
+                )
+                fields["chunks"] = indexed
+        except JobCancelled:
+            if failures:
+                raise failures[0]
+            raise
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        job.add(indexed=indexed)
+
+    # ----- stages ----------------------------------------------------------
+
+    @staticmethod
+    def _spawn(name: str, target: Callable, job: IngestionJob, stop: threading.Event, failures: list, *args):
+        def run() -> None:
+            try:
+                target(job, stop, *args)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                log.error("Ingestion stage failed", job_id=job.id, stage=name, error=str(e))
+                failures.append(e)
+                stop.set()
+
+        thread = threading.Thread(target=run, name=f"ingest-{name}-{job.id[:8]}", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _put(job: IngestionJob, stop: threading.Event, q: queue.Queue, item: Any) -> None:
+        while True:
+            if stop.is_set() or job.cancelled:
+                raise JobCancelled()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _get(job: IngestionJob, stop: threading.Event, q: queue.Queue) -> Any:
+        while True:
+            if stop.is_set() or job.cancelled:
+                raise JobCancelled()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _load_stage(self, job: IngestionJob, stop: threading.Event, paths: List[Path], out: queue.Queue) -> None:
+        loaded = iter_documents(
+            paths,
+            workers=self.ingestion.loader_workers,
+            pages_per_task=self.ingestion.pages_per_task,
+        )
+        try:
+            for item in loaded:
+                if item.error:
+                    job.fail_file(str(item.path), item.error)
+                    continue
+                job.add(files_loaded=1, pages=len(item.documents))
+                self._put(job, stop, out, item.documents)
+        finally:
+            loaded.close()
+        self._put(job, stop, out, _DONE)
+
+    def _split_stage(
+        self,
+        job: IngestionJob,
+        stop: threading.Event,
+        inbox: queue.Queue,
+        out: queue.Queue,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> None:
+        splitter = self.ingestion._make_splitter(chunk_size, chunk_overlap)
+        batch: list = []
+        while True:
+            docs = self._get(job, stop, inbox)
+            if docs is _DONE:
+                break
+            chunks = splitter.split_documents(docs)
+            job.add(chunks=len(chunks))
+            batch.extend(chunks)
+            while len(batch) >= self.embed_batch_size:
+                self._put(job, stop, out, batch[: self.embed_batch_size])
+                batch = batch[self.embed_batch_size:]
+
+        if batch:
+            self._put(job, stop, out, batch)
+        self._put(job, stop, out, _DONE)
+
+    def _embed_stage(
+        self,
+        job: IngestionJob,
+        stop: threading.Event,
+        manager: FaissManager,
+        inbox: queue.Queue,
+        out: queue.Queue,
+    ) -> None:
+        while True:
+            batch = self._get(job, stop, inbox)
+            if batch is _DONE:
+                break
+            try:
+                vectors = manager.embeddings.embed_documents([doc.page_content for doc in batch])
+            except Exception as e:
+                # Drop every source in the batch; its other chunks are filtered out at index time.
+                for source in {doc.metadata.get("source", "unknown") for doc in batch}:
+                    job.fail_file(source, f"embedding failed: {e}")
+                continue
+            job.add(embedded=len(batch))
+            self._put(job, stop, out, (batch, vectors))
+
+        self._put(job, stop, out, _DONE)
+
+    def _drain(self, job: IngestionJob, stop: threading.Event, inbox: queue.Queue):
+        while True:
+            item = self._get(job, stop, inbox)
+            if item is _DONE:
+                return
+            yield item
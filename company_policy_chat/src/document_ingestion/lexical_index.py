@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w[\w,.\-'/]*\w|\w")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "my", "of", "on", "or", "the", "to", "what",
+    "when", "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 OR-query of quoted terms.
+
+    Quoting keeps tokens such as ``1,250`` or ``at-will`` as exact phrases
+    and stops user input from being parsed as FTS5 syntax.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(query.lower()):
+        if token in _STOPWORDS or token in terms:
+            continue
+        terms.append(token)
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the same chunks as the FAISS store.
+
+    Backed by an SQLite FTS5 table next to ``index.faiss``, which gives a
+    compact on-disk posting list format, BM25 ranking and cheap per-document
+    insert/delete, so FaissManager can keep it in sync incrementally.
+
+    ``doc_id`` is not indexed by FTS5, so an ordinary ``chunk_ids`` table maps
+    it to the FTS rowid for deletes. ``read_only`` opens the file with
+    ``mode=ro`` and never touches the schema, for published snapshots.
+    """
+
+    FILENAME = "lexical.sqlite"
+
+    def __init__(self, index_dir: Union[str, Path], read_only: bool = False):
+        self.path = Path(index_dir) / self.FILENAME
+        self.read_only = read_only
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False)
+                self._prepare(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _prepare(conn: sqlite3.Connection) -> None:
+        # Writers only ever touch an unpublished snapshot, so a rollback
+        # journal suffices and read-only openers never need -wal/-shm files.
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks "
+            "USING fts5(doc_id UNINDEXED, content, tokenize='porter unicode61')"
+        )
+        has_ids = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_ids'"
+        ).fetchone()
+        if not has_ids:
+            conn.execute("CREATE TABLE chunk_ids (rowid INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)")
+            conn.execute("CREATE INDEX chunk_ids_doc_id ON chunk_ids (doc_id)")
+            # Files written before the map existed: one scan to backfill it.
+            conn.execute("INSERT INTO chunk_ids (rowid, doc_id) SELECT rowid, doc_id FROM chunks")
+        conn.commit()
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def copy_to(self, index_dir: Union[str, Path]) -> "LexicalIndex":
+        """Consistent, writable copy in another directory via the SQLite backup API."""
+        target = LexicalIndex(index_dir)
+        if self.exists():
+            with self._write_lock:
+                conn = target._conn()
+                self._conn().backup(conn)
+                # The backup brings the source's schema and journal mode along.
+                self._prepare(conn)
+        return target
+
+    def count(self) -> int:
+        (n,) = self._conn().execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return n
+
+    def add(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Index ``(doc_id, text)`` pairs."""
+        with self._write_lock:
+            conn = self._conn()
+            for doc_id, text in items:
+                row = conn.execute("INSERT INTO chunk_ids (doc_id) VALUES (?)", (doc_id,)).lastrowid
+                conn.execute("INSERT INTO chunks (rowid, doc_id, content) VALUES (?, ?, ?)", (row, doc_id, text))
+            conn.commit()
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            for doc_id in doc_ids:
+                rows = conn.execute("SELECT rowid FROM chunk_ids WHERE doc_id = ?", (doc_id,)).fetchall()
+                conn.executemany("DELETE FROM chunks WHERE rowid = ?", rows)
+                conn.execute("DELETE FROM chunk_ids WHERE doc_id = ?", (doc_id,))
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("DELETE FROM chunks")
+            conn.execute("DELETE FROM chunk_ids")
+            conn.commit()
+
+    def optimize(self) -> None:
+        """Merge FTS5 segments; worth running after large ingests."""
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("INSERT INTO chunks(chunks) VALUES ('optimize')")
+            conn.commit()
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Return ``(doc_id, score)`` best first; higher score is better."""
+        expression = _match_expression(query)
+        if not expression:
+            return []
+
+        rows = self._conn().execute(
+            "SELECT doc_id, bm25(chunks) AS score FROM chunks WHERE chunks MATCH ? ORDER BY score LIMIT ?",
+            (expression, k),
+        ).fetchall()
+        # FTS5's bm25() is negated so that ORDER BY ascending ranks best first.
+        return [(doc_id, -score) for doc_id, score in rows]
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+class IngestionManifest:
+    """Persistent map of ``source -> {hash, ids}`` stored next to ``index.faiss``.
+
+    The manifest lets ingestion decide in O(1) per file whether a source is
+    unchanged, and tells it exactly which docstore ids to delete when a
+    source is replaced or removed, without scanning the docstore.
+    """
+
+    FILENAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self._sources: Dict[str, Dict] = {}
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        return self.index_dir / self.FILENAME
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f) or {}
+
+        self._sources = data.get("sources", {})
+        log.info("Ingestion manifest loaded", path=str(self.path), sources=len(self._sources))
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "sources": self._sources}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    def get_hash(self, source: str) -> Optional[str]:
+        entry = self._sources.get(source)
+        return entry.get("hash") if entry else None
+
+    def is_unchanged(self, source: str, content_hash: str) -> bool:
+        return self.get_hash(source) == content_hash
+
+    def ids_for(self, source: str) -> List[str]:
+        entry = self._sources.get(source)
+        return list(entry.get("ids", [])) if entry else []
+
+    def record(self, source: str, content_hash: Optional[str], ids: Iterable[str]) -> None:
+        self._sources[source] = {"hash": content_hash, "ids": list(ids)}
+
+    def clear(self) -> None:
+        self._sources = {}
+
+    def remove(self, source: str) -> List[str]:
+        """Forget a source and return the docstore ids that belonged to it."""
+        entry = self._sources.pop(source, None)
+        return list(entry.get("ids", [])) if entry else []
+
+    def bootstrap_from_docstore(self, index_to_docstore_id: Dict[int, str], docstore) -> None:
+        """One-time migration for indexes built before the manifest existed.
+
+        Sources are recorded without a hash so the next ingest of the same
+        file replaces its chunks instead of duplicating them.
+        """
+        grouped: Dict[str, List[str]] = {}
+
+        for doc_id in index_to_docstore_id.values():
+            doc = docstore.search(doc_id)
+            source = getattr(doc, "metadata", {}).get("source") if doc else None
+            if source:
+                grouped.setdefault(source, []).append(doc_id)
+
+        for source, ids in grouped.items():
+            self.record(source, None, ids)
+
+        log.info("Ingestion manifest bootstrapped from docstore", sources=len(grouped))
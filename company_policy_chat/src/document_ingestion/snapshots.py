@@ -0,0 +1,219 @@
+"""
+Versioned index snapshots.
+
+Each ingestion writes a complete index (vectors, docstore, lexical index,
+manifest) into a fresh ``snapshots/<version>/`` directory and then
+publishes it by atomically replacing the one-line ``CURRENT`` pointer. A
+reader resolves the pointer once and only ever sees a finished snapshot,
+never a half-written file pair. Snapshots are never modified after
+publication; old ones are removed by ``collect_garbage`` once they have
+been superseded for longer than the retention window.
+
+Writers of one index directory take ``writer_lock`` for the whole
+stage-to-publish window, so each snapshot is built on the one published
+before it and no writer's changes are dropped by another's publish.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within the process
+    fcntl = None
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+POINTER = "CURRENT"
+SNAPSHOT_DIR = "snapshots"
+LOCK_FILE = ".lock"
+
+# Files of the pre-snapshot layout, written directly into the index directory.
+LEGACY_FILES = (
+    "index.faiss",
+    "index.pkl",
+    "index.docstore.sqlite",
+    "lexical.sqlite",
+    "lexical.sqlite-wal",
+    "lexical.sqlite-shm",
+    "manifest.json",
+)
+
+
+def _pointer(index_dir: Union[str, Path]) -> Path:
+    return Path(index_dir) / POINTER
+
+
+def current_version(index_dir: Union[str, Path]) -> Optional[str]:
+    """Name of the published snapshot, or None for an unversioned directory."""
+    try:
+        return _pointer(index_dir).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def locate(index_dir: Union[str, Path]) -> Tuple[Optional[str], Path]:
+    """(snapshot name, directory to read) from a single read of the pointer."""
+    version = current_version(index_dir)
+    if version is None:
+        return None, Path(index_dir)
+    return version, Path(index_dir) / SNAPSHOT_DIR / version
+
+
+def resolve(index_dir: Union[str, Path]) -> Path:
+    """Directory to read the index from: the current snapshot, or the legacy flat layout."""
+    return locate(index_dir)[1]
+
+
+def has_index(index_dir: Union[str, Path], index_name: str = "index") -> bool:
+    return (resolve(index_dir) / f"{index_name}.faiss").exists()
+
+
+def new_snapshot(index_dir: Union[str, Path]) -> Path:
+    """Create an empty, unpublished snapshot directory; names sort by creation time."""
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    name = f"{stamp}-{time.time_ns() % 1_000_000_000:09d}-{uuid.uuid4().hex[:6]}"
+    path = Path(index_dir) / SNAPSHOT_DIR / name
+    path.mkdir(parents=True)
+    return path
+
+
+def _fsync_dir(path: Path) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def publish(index_dir: Union[str, Path], snapshot: Path) -> str:
+    """Point ``CURRENT`` at ``snapshot`` with a single atomic rename."""
+    index_dir = Path(index_dir)
+    _fsync_dir(snapshot)
+
+    tmp = index_dir / f".{POINTER}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(snapshot.name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, _pointer(index_dir))
+    _fsync_dir(index_dir)
+
+    log.info("Index snapshot published", index_dir=str(index_dir), version=snapshot.name)
+    return snapshot.name
+
+
+_held = threading.local()
+_process_locks: Dict[str, threading.Lock] = {}
+_process_locks_guard = threading.Lock()
+
+
+@contextmanager
+def writer_lock(index_dir: Union[str, Path]) -> Iterator[None]:
+    """
+    Exclusive write access to ``index_dir`` across threads and processes.
+
+    An ``flock`` on ``index_dir/.lock``; each acquisition opens its own file
+    description, so threads of one process exclude each other as well.
+    Re-entrant within a thread, so a job can hold it around a manager call
+    that takes it again.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    key = str(index_dir.resolve())
+    depth: Dict[str, int] = _held.__dict__.setdefault("depth", {})
+
+    if depth.get(key):
+        depth[key] += 1
+        try:
+            yield
+        finally:
+            depth[key] -= 1
+        return
+
+    with open(index_dir / LOCK_FILE, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            with _process_locks_guard:
+                fallback = _process_locks.setdefault(key, threading.Lock())
+            fallback.acquire()
+        depth[key] = 1
+        try:
+            yield
+        finally:
+            del depth[key]
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                fallback.release()
+
+
+def discard(snapshot: Path) -> None:
+    """Remove a snapshot that was never published (e.g. a failed write)."""
+    shutil.rmtree(snapshot, ignore_errors=True)
+
+
+def collect_garbage(
+    index_dir: Union[str, Path],
+    *,
+    retention_s: float = 3600,
+    keep: int = 1,
+) -> List[str]:
+    """
+    Delete snapshots superseded more than ``retention_s`` ago, always
+    keeping the current one and the ``keep`` newest before it. Serving
+    processes still holding an old snapshot swap to the new one within
+    their reload interval, which must stay well below the retention window.
+    """
+    index_dir = Path(index_dir)
+    current = current_version(index_dir)
+    root = index_dir / SNAPSHOT_DIR
+    if current is None or not root.is_dir():
+        return []
+
+    now = time.time()
+    older = sorted((p for p in root.iterdir() if p.is_dir() and p.name < current), reverse=True)
+    removed: List[str] = []
+
+    for snapshot in older[keep:]:
+        # A snapshot stops being current when its successor is created.
+        successor = min((p for p in root.iterdir() if p.name > snapshot.name), default=None)
+        superseded_at = successor.stat().st_mtime if successor else now
+        if now - superseded_at < retention_s:
+            continue
+        shutil.rmtree(snapshot, ignore_errors=True)
+        removed.append(snapshot.name)
+
+    # Unpublished leftovers newer than CURRENT come from writers that crashed.
+    for orphan in (p for p in root.iterdir() if p.is_dir() and p.name > current):
+        if now - orphan.stat().st_mtime >= retention_s:
+            shutil.rmtree(orphan, ignore_errors=True)
+            removed.append(orphan.name)
+
+    # The flat layout was superseded by the first snapshot; keep it readable
+    # for processes started before the migration until retention expires.
+    first = min((p for p in root.iterdir() if p.is_dir()), default=None)
+    if first is not None and now - first.stat().st_mtime >= retention_s:
+        for name in LEGACY_FILES:
+            legacy = index_dir / name
+            if legacy.exists():
+                legacy.unlink()
+                removed.append(name)
+
+    if removed:
+        log.info("Old index snapshots removed", index_dir=str(index_dir), removed=removed)
+    return removed
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache matched on the embedding of the standalone question.
+
+    A lookup returns a stored answer when a previous question asked against
+    the same index version has cosine similarity >= ``threshold``. Entries
+    expire after ``ttl_seconds`` and the least recently used entry is evicted
+    once ``max_entries`` is reached.
+
+    Questions that differ in a single qualifier ("part-time" vs "full-time",
+    "2024" vs "2025") often stay above 0.95 with small embedding models, so
+    by default (``exact_text``) a hit also requires the same normalised
+    question text; the similarity check then only guards against stale
+    vectors. Turning it off trades that safety for more hits.
+
+    Exact-text lookups are a dict hit plus one dot product. The similarity
+    path scores against a per-version matrix that is rebuilt only after an
+    insert or eviction touched that version.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        *,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 2048,
+        exact_text: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.exact_text = exact_text
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._by_text: Dict[Tuple[str, str], int] = {}
+        self._by_age: Deque[Tuple[float, int]] = deque()
+        self._matrices: Dict[str, Tuple[List[int], np.ndarray]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Case, whitespace and punctuation-insensitive form of a question."""
+        return " ".join(re.sub(r"[^\w\s]", " ", question.casefold()).split())
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._matrices.pop(entry["version"], None)
+        text_key = (entry["version"], entry["text"])
+        if self._by_text.get(text_key) == key:
+            del self._by_text[text_key]
+
+    def _expire(self, now: float) -> None:
+        # Ids are handed out in creation order, so expired entries are at the front.
+        while self._by_age and now - self._by_age[0][0] > self.ttl_seconds:
+            self._remove(self._by_age.popleft()[1])
+
+    def _matrix(self, index_version: str) -> Tuple[List[int], Optional[np.ndarray]]:
+        built = self._matrices.get(index_version)
+        if built is None:
+            keys = [k for k, e in self._entries.items() if e["version"] == index_version]
+            matrix = np.stack([self._entries[k]["vector"] for k in keys]) if keys else None
+            built = self._matrices[index_version] = (keys, matrix)
+        return built
+
+    def lookup(self, question: str, index_version: str, vector: Optional[np.ndarray] = None) -> Optional[str]:
+        vector = self.embed(question) if vector is None else vector
+        text = self.normalize(question)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+
+            key, score = None, None
+            if self.exact_text:
+                key = self._by_text.get((index_version, text))
+                if key is not None:
+                    score = float(self._entries[key]["vector"] @ vector)
+            else:
+                keys, matrix = self._matrix(index_version)
+                if keys:
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    key, score = keys[best], float(scores[best])
+
+            if key is not None and score >= self.threshold:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                log.info("Semantic cache hit", similarity=round(score, 4))
+                return self._entries[key]["answer"]
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, answer: str, index_version: str, vector: Optional[np.ndarray] = None) -> None:
+        vector = self.embed(question) if vector is None else vector
+        text = self.normalize(question)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+            # A repeated question replaces its older answer rather than shadowing it.
+            previous = self._by_text.get((index_version, text))
+            if previous is not None:
+                self._remove(previous)
+
+            key = self._next_id
+            self._next_id += 1
+            self._entries[key] = {
+                "text": text,
+                "vector": vector,
+                "answer": answer,
+                "version": index_version,
+                "created": now,
+            }
+            self._by_text[(index_version, text)] = key
+            self._by_age.append((now, key))
+            self._matrices.pop(index_version, None)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            if len(self._by_age) > 2 * self.max_entries:
+                self._by_age = deque(item for item in self._by_age if item[1] in self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_text.clear()
+            self._by_age.clear()
+            self._matrices.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else None,
+            "entries": len(self._entries),
+        }
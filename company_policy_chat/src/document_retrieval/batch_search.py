@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+@dataclass
+class BatchAnswer:
+    """Outcome of one question in ``Retrieval.batch``; ``error`` is set instead of raising."""
+
+    question: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def embed_queries(embeddings, texts: Sequence[str]) -> np.ndarray:
+    """
+    Embed many queries as queries, so they hit the same cache entries and
+    get the same vectors as ``embed_query``. Uses the embedder's batched
+    ``embed_queries`` (CachedEmbeddings / InstrumentedEmbeddings) when it
+    has one, and falls back to one ``embed_query`` call per text.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    batched = getattr(embeddings, "embed_queries", None)
+    vectors = batched(list(texts)) if batched else [embeddings.embed_query(text) for text in texts]
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row, leaving zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def search_batch(
+    vectorstore,
+    vectors: np.ndarray,
+    *,
+    search_type: str = "similarity",
+    k: int = 4,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+) -> List[List[Document]]:
+    """
+    Search a LangChain FAISS store for every row of ``vectors`` in one
+    ``index.search`` call, then apply MMR per row when requested. Results
+    are in the same order as ``vectors``.
+    """
+    if len(vectors) == 0:
+        return []
+
+    index = vectorstore.index
+    n = min(fetch_k if search_type == "mmr" else k, index.ntotal)
+    if n <= 0:
+        return [[] for _ in range(len(vectors))]
+
+    queries = np.ascontiguousarray(vectors, dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        queries = unit_rows(queries)
+
+    _, positions = index.search(queries, n)
+
+    results: List[List[Document]] = []
+    for row, query in zip(positions, queries):
+        hits = [int(pos) for pos in row if pos != -1]
+
+        if search_type == "mmr" and hits:
+            from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+            selected = maximal_marginal_relevance(
+                query,
+                [index.reconstruct(pos) for pos in hits],
+                k=min(k, len(hits)),
+                lambda_mult=lambda_mult,
+            )
+            hits = [hits[i] for i in selected]
+        else:
+            hits = hits[:k]
+
+        docs = []
+        for pos in hits:
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[pos])
+            if isinstance(doc, Document):
+                docs.append(doc)
+        results.append(docs)
+
+    log.info("Batched FAISS search finished", queries=len(vectors), search_type=search_type, n=n)
+    return results
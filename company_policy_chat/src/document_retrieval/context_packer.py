@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+from company_policy_chat.utils.metrics import get_metrics
+
+log = CustomLogger().get_logger(__name__)
+
+
+@dataclass
+class _Block:
+    """A run of text stitched together from chunks of one source/page."""
+
+    text: str
+    rank: int
+    start: Optional[int] = None
+    end: Optional[int] = None
+    chunks: int = 1
+
+
+@dataclass
+class PackResult:
+    text: str
+    tokens_in: int
+    tokens_out: int
+    chunks_in: int
+    blocks_out: int
+    truncated: bool = False
+    dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_in - self.tokens_out)
+
+
+def _suffix_prefix_overlap(left: str, right: str, min_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    probe = right[:min_overlap]
+    if len(probe) < min_overlap:
+        return 0
+
+    best = 0
+    pos = left.find(probe, max(0, len(left) - len(right)))
+    while pos != -1:
+        size = len(left) - pos
+        if right.startswith(left[pos:]):
+            best = size
+            break
+        pos = left.find(probe, pos + 1)
+    return best
+
+
+class ContextPacker:
+    """
+    Build the QA prompt context from retrieved chunks within a token budget.
+
+    Chunks from the same source and page are stitched back together: when
+    they carry ``start_index`` (added by the splitter at ingestion) the
+    offsets decide where they overlap, otherwise the overlapping text itself
+    is matched. Each merged block keeps the best rank of its chunks, blocks
+    are emitted in rank order, identical blocks are dropped and the result is
+    cut at ``max_tokens``. Tokens are estimated from characters since the
+    Groq tokenizer is not available locally.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_tokens: int = 3000,
+        chars_per_token: float = 4.0,
+        min_overlap_chars: int = 20,
+        separator: str = "\n\n",
+    ):
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.min_overlap_chars = min_overlap_chars
+        self.separator = separator
+
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "tokens_in": 0, "tokens_out": 0, "truncated": 0}
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    @staticmethod
+    def _group_key(doc: Document) -> Tuple[Any, Any]:
+        meta = doc.metadata or {}
+        return meta.get("source"), meta.get("page")
+
+    def _merge_by_offset(self, ranked: List[Tuple[int, Document]]) -> List[_Block]:
+        blocks: List[_Block] = []
+        for rank, doc in sorted(ranked, key=lambda item: item[1].metadata["start_index"]):
+            start = doc.metadata["start_index"]
+            end = start + len(doc.page_content)
+            current = blocks[-1] if blocks else None
+
+            if current is not None and start <= current.end:
+                if end > current.end:
+                    current.text += doc.page_content[current.end - start:]
+                    current.end = end
+                current.rank = min(current.rank, rank)
+                current.chunks += 1
+            else:
+                blocks.append(_Block(doc.page_content, rank, start, end))
+        return blocks
+
+    def _merge_by_text(self, ranked: List[Tuple[int, Document]]) -> List[_Block]:
+        blocks: List[_Block] = []
+        for rank, doc in ranked:
+            text = doc.page_content
+            for block in blocks:
+                if text in block.text:
+                    pass
+                elif (size := _suffix_prefix_overlap(block.text, text, self.min_overlap_chars)):
+                    block.text += text[size:]
+                elif (size := _suffix_prefix_overlap(text, block.text, self.min_overlap_chars)):
+                    block.text = text + block.text[size:]
+                else:
+                    continue
+                block.rank = min(block.rank, rank)
+                block.chunks += 1
+                break
+            else:
+                blocks.append(_Block(text, rank))
+        return blocks
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        limit = int(tokens * self.chars_per_token)
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        # Prefer ending on a sentence, then on a word.
+        for boundary in (". ", "\n", " "):
+            pos = cut.rfind(boundary)
+            if pos > limit // 2:
+                return cut[: pos + 1].rstrip()
+        return cut
+
+    def pack(self, docs: Sequence[Document]) -> PackResult:
+        docs = [doc for doc in docs if getattr(doc, "page_content", "")]
+        tokens_in = self.estimate_tokens(self.separator.join(doc.page_content for doc in docs))
+
+        groups: Dict[Tuple[Any, Any], List[Tuple[int, Document]]] = {}
+        for rank, doc in enumerate(docs):
+            groups.setdefault(self._group_key(doc), []).append((rank, doc))
+
+        blocks: List[_Block] = []
+        for ranked in groups.values():
+            if all(isinstance((doc.metadata or {}).get("start_index"), int) for _, doc in ranked):
+                blocks.extend(self._merge_by_offset(ranked))
+            else:
+                blocks.extend(self._merge_by_text(ranked))
+        blocks.sort(key=lambda block: block.rank)
+
+        parts: List[str] = []
+        seen = set()
+        used = 0
+        truncated = False
+        dropped = 0
+        sep_tokens = self.estimate_tokens(self.separator)
+
+        for position, block in enumerate(blocks):
+            text = block.text.strip()
+            if not text or text in seen:
+                continue
+            seen.add(text)
+
+            cost = self.estimate_tokens(text) + (sep_tokens if parts else 0)
+            remaining = self.max_tokens - used
+            if cost > remaining:
+                room = remaining - (sep_tokens if parts else 0)
+                # Only keep a partial block if a meaningful piece of it fits.
+                if room >= 64:
+                    text = self._truncate(text, room)
+                    parts.append(text)
+                    used += self.estimate_tokens(text) + (sep_tokens if len(parts) > 1 else 0)
+                    truncated = True
+                dropped = len(blocks) - position - int(truncated)
+                break
+
+            parts.append(text)
+            used += cost
+
+        result = PackResult(
+            text=self.separator.join(parts),
+            tokens_in=tokens_in,
+            tokens_out=used,
+            chunks_in=len(docs),
+            blocks_out=len(parts),
+            truncated=truncated,
+            dropped=dropped,
+        )
+        self._record(result)
+        return result
+
+    def pack_text(self, docs: Sequence[Document]) -> str:
+        """LCEL adapter returning just the packed context string."""
+        return self.pack(docs).text
+
+    def _record(self, result: PackResult) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["tokens_in"] += result.tokens_in
+            self._stats["tokens_out"] += result.tokens_out
+            self._stats["truncated"] += int(result.truncated)
+
+        get_metrics().inc("context_tokens_saved_total", result.tokens_saved)
+        log.info(
+            "Context packed",
+            chunks=result.chunks_in,
+            blocks=result.blocks_out,
+            tokens_in=result.tokens_in,
+            tokens_out=result.tokens_out,
+            tokens_saved=result.tokens_saved,
+            truncated=result.truncated,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_saved"] = max(0, stats["tokens_in"] - stats["tokens_out"])
+        stats["max_tokens"] = self.max_tokens
+        return stats
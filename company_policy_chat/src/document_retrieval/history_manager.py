@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+@dataclass
+class CompactedHistory:
+    """History views handed to each chain stage."""
+
+    qa: List[BaseMessage]
+    rewrite: List[BaseMessage]
+    summary: Optional[str]
+    tokens_in: int
+    tokens_out: int
+
+
+class ChatHistoryManager:
+    """
+    Keep prompts bounded as a conversation grows.
+
+    The last ``keep_turns`` turns stay verbatim; older turns are folded into
+    a running summary in steps of ``fold_turns`` so the summariser is not
+    called on every turn. Summaries are cached by a digest of the folded
+    prefix, so each call only summarises turns added since the last fold,
+    starting from the previous summary, while callers keep passing the full
+    history. The QA prompt gets the summary plus the verbatim turns within
+    ``max_tokens``; the question rewriter only gets the last
+    ``rewrite_turns`` turns, which is all it needs to resolve references.
+    """
+
+    def __init__(
+        self,
+        summarize_chain: Runnable,
+        *,
+        keep_turns: int = 4,
+        fold_turns: int = 2,
+        rewrite_turns: int = 2,
+        max_tokens: int = 1500,
+        chars_per_token: float = 4.0,
+        cache_size: int = 1024,
+    ):
+        self.summarize_chain = summarize_chain
+        self.keep_turns = keep_turns
+        self.fold_turns = max(1, fold_turns)
+        self.rewrite_turns = rewrite_turns
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.cache_size = cache_size
+
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "summaries": 0, "tokens_in": 0, "tokens_out": 0}
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def _message_tokens(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.estimate_tokens(str(m.content)) for m in messages)
+
+    @staticmethod
+    def _transcript(messages: Sequence[BaseMessage]) -> str:
+        role = {"human": "User", "ai": "Assistant"}
+        return "\n".join(f"{role.get(m.type, m.type)}: {m.content}" for m in messages)
+
+    @staticmethod
+    def _prefix_digests(messages: Sequence[BaseMessage], step: int) -> List[str]:
+        """Digest of ``messages[:i * step]`` for every fold boundary i >= 1."""
+        digests: List[str] = []
+        running = hashlib.sha1()
+        for i, message in enumerate(messages, start=1):
+            running.update(f"{message.type}\x00{message.content}\x01".encode("utf-8"))
+            if i % step == 0:
+                digests.append(running.copy().hexdigest())
+        return digests
+
+    def _plan(self, history: Sequence[BaseMessage]) -> Tuple[int, List[str], int, str]:
+        """Split point, prefix digests, start of the unsummarised part and its summary."""
+        step = 2 * self.fold_turns
+        overflow = max(0, len(history) - 2 * self.keep_turns)
+        fold_at = (overflow // step) * step
+        if not fold_at:
+            return 0, [], 0, ""
+
+        digests = self._prefix_digests(history[:fold_at], step)
+        with self._lock:
+            for boundary in range(len(digests), 0, -1):
+                summary = self._summaries.get(digests[boundary - 1])
+                if summary is not None:
+                    self._summaries.move_to_end(digests[boundary - 1])
+                    return fold_at, digests, boundary * step, summary
+        return fold_at, digests, 0, ""
+
+    def _remember(self, digest: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[digest] = summary
+            self._summaries.move_to_end(digest)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+            self._stats["summaries"] += 1
+
+    def _summary_inputs(self, summary: str, messages: Sequence[BaseMessage]) -> Dict[str, Any]:
+        return {"summary": summary or "(none yet)", "lines": self._transcript(messages)}
+
+    def _assemble(self, history: Sequence[BaseMessage], fold_at: int, summary: str) -> CompactedHistory:
+        recent = list(history[fold_at:])
+        budget = self.max_tokens - self.estimate_tokens(summary)
+
+        # Drop the oldest verbatim messages that do not fit, keeping the last turn.
+        while len(recent) > 2 and self._message_tokens(recent) > budget:
+            recent = recent[2:]
+
+        qa: List[BaseMessage] = []
+        if summary:
+            qa.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        qa.extend(recent)
+
+        rewrite = list(history[-2 * self.rewrite_turns:]) if self.rewrite_turns else []
+
+        result = CompactedHistory(
+            qa=qa,
+            rewrite=rewrite,
+            summary=summary or None,
+            tokens_in=self._message_tokens(history),
+            tokens_out=self._message_tokens(qa),
+        )
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["tokens_in"] += result.tokens_in
+            self._stats["tokens_out"] += result.tokens_out
+        return result
+
+    def compact(self, history: Sequence[BaseMessage], config: Optional[RunnableConfig] = None) -> CompactedHistory:
+        history = list(history or [])
+        fold_at, digests, start, summary = self._plan(history)
+
+        if start < fold_at:
+            summary = self.summarize_chain.invoke(self._summary_inputs(summary, history[start:fold_at]), config)
+            self._remember(digests[-1], summary)
+            log.info("Chat history folded into summary", folded_messages=fold_at - start, total=len(history))
+
+        return self._assemble(history, fold_at, summary)
+
+    async def acompact(
+        self,
+        history: Sequence[BaseMessage],
+        config: Optional[RunnableConfig] = None,
+    ) -> CompactedHistory:
+        history = list(history or [])
+        fold_at, digests, start, summary = self._plan(history)
+
+        if start < fold_at:
+            summary = await self.summarize_chain.ainvoke(
+                self._summary_inputs(summary, history[start:fold_at]), config
+            )
+            self._remember(digests[-1], summary)
+            log.info("Chat history folded into summary", folded_messages=fold_at - start, total=len(history))
+
+        return self._assemble(history, fold_at, summary)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_saved"] = max(0, stats["tokens_in"] - stats["tokens_out"])
+        return stats
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, PrivateAttr
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = 60) -> List[str]:
+    """Fuse ranked id lists; each list contributes ``1 / (rrf_k + rank)`` per id."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Lexical (BM25) + dense retrieval fused with reciprocal rank fusion.
+
+    Both searches run concurrently: the embedding + FAISS search on one
+    thread and the FTS5 BM25 query on another. Each returns ``fetch_k``
+    docstore ids, RRF merges them, and the top ``k`` documents are loaded.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Any
+    lexical_index: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    _executor: ThreadPoolExecutor = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid-search")
+
+    def _vector_ids(self, query: str) -> List[str]:
+        vs = self.vectorstore
+        vector = np.asarray([vs.embedding_function.embed_query(query)], dtype=np.float32)
+        _, positions = vs.index.search(vector, self.fetch_k)
+        return [vs.index_to_docstore_id[int(pos)] for pos in positions[0] if pos != -1]
+
+    def _lexical_ids(self, query: str) -> List[str]:
+        return [doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        vector_future = self._executor.submit(self._vector_ids, query)
+        lexical_future = self._executor.submit(self._lexical_ids, query)
+
+        vector_ids = vector_future.result()
+        try:
+            lexical_ids = lexical_future.result()
+        except Exception as e:
+            # A broken lexical index should degrade to dense-only, not fail the query.
+            log.warning("Lexical search failed, using vector results only", error=str(e))
+            lexical_ids = []
+
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids], self.rrf_k)
+
+        docs: List[Document] = []
+        for doc_id in fused:
+            doc = self.vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                docs.append(doc)
+            if len(docs) == self.k:
+                break
+
+        log.info(
+            "Hybrid search finished",
+            vector_hits=len(vector_ids),
+            lexical_hits=len(lexical_ids),
+            returned=len(docs),
+        )
+        return docs
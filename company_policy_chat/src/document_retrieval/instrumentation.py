@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+from company_policy_chat.utils.metrics import get_metrics
+
+log = CustomLogger().get_logger(__name__)
+
+# Run names given to chain steps in Retrieval._build_lcel_chain.
+TRACKED_STAGES = {"rewrite", "rewrite_llm", "retrieve", "rerank", "pack_context", "generate", "summarize_history"}
+
+
+class RequestTimer(BaseCallbackHandler):
+    """
+    Per-request LangChain callback that times each named chain stage.
+
+    Chain steps are tagged with ``run_name`` so their start/end callbacks can
+    be matched; the retriever is tracked through the retriever callbacks.
+    Token usage is read from LLM results. ``finish`` emits one ``rag_request``
+    structlog event and feeds the process-wide metrics.
+    """
+
+    def __init__(self, path: str = "chain"):
+        self.path = path
+        self.start = time.perf_counter()
+        self.stages_ms: Dict[str, float] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.retrieved_chunks = 0
+        self.ttft_ms: Optional[float] = None
+        self._open: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _begin(self, run_id: UUID, name: Optional[str]) -> None:
+        if name in TRACKED_STAGES:
+            with self._lock:
+                self._open[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id: UUID) -> Optional[str]:
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+            if entry is None:
+                return None
+            name, started = entry
+            self.stages_ms[name] = self.stages_ms.get(name, 0.0) + (time.perf_counter() - started) * 1000
+            return name
+
+    def add_stage(self, name: str, elapsed_ms: float) -> None:
+        """Record a stage timed outside the chain (e.g. the answer-cache lookup)."""
+        with self._lock:
+            self.stages_ms[name] = self.stages_ms.get(name, 0.0) + elapsed_ms
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._begin(run_id, kwargs.get("name"))
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._begin(run_id, kwargs.get("name"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._begin(run_id, kwargs.get("name"))
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            entry = self._open.get(run_id)
+            if entry and entry[0] == "generate" and self.ttft_ms is None:
+                self.ttft_ms = (time.perf_counter() - self.start) * 1000
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        name = self._end(run_id)
+        if name is None:
+            return
+
+        usage = self._usage(response)
+        if usage:
+            with self._lock:
+                stage_tokens = self.tokens.setdefault(name, {"input": 0, "output": 0})
+                stage_tokens["input"] += usage.get("input", 0)
+                stage_tokens["output"] += usage.get("output", 0)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._open[run_id] = ("retrieve", time.perf_counter())
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+        with self._lock:
+            self.retrieved_chunks += len(documents)
+
+    def on_retriever_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    @staticmethod
+    def _usage(response) -> Dict[str, int]:
+        for generations in getattr(response, "generations", []) or []:
+            for generation in generations:
+                meta = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if meta:
+                    return {"input": meta.get("input_tokens", 0), "output": meta.get("output_tokens", 0)}
+
+        token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if token_usage:
+            return {
+                "input": token_usage.get("prompt_tokens", 0),
+                "output": token_usage.get("completion_tokens", 0),
+            }
+        return {}
+
+    def finish(self, status: str = "ok") -> Dict[str, Any]:
+        total_ms = (time.perf_counter() - self.start) * 1000
+        metrics = get_metrics()
+
+        metrics.inc("rag_requests_total", labels={"path": self.path, "status": status})
+        metrics.observe("rag_request_duration_ms", total_ms, {"path": self.path})
+        for stage, elapsed in self.stages_ms.items():
+            metrics.observe("stage_duration_ms", elapsed, {"stage": stage})
+        for stage, counts in self.tokens.items():
+            for kind, value in counts.items():
+                metrics.inc("llm_tokens_total", value, {"stage": stage, "kind": kind})
+        metrics.inc("retrieved_chunks_total", self.retrieved_chunks)
+        if self.ttft_ms is not None:
+            metrics.observe("rag_time_to_first_token_ms", self.ttft_ms)
+
+        summary = {
+            "path": self.path,
+            "status": status,
+            "total_ms": round(total_ms, 3),
+            "stages_ms": {k: round(v, 3) for k, v in self.stages_ms.items()},
+            "tokens": self.tokens,
+            "retrieved_chunks": self.retrieved_chunks,
+            "ttft_ms": round(self.ttft_ms, 3) if self.ttft_ms is not None else None,
+        }
+        log.info("rag_request", **summary)
+        return summary
+
+    def config(self) -> Dict[str, List["RequestTimer"]]:
+        return {"callbacks": [self]}
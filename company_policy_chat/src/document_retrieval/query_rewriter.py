@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+# Words that usually point back into the conversation ("what about it?",
+# "does that apply to them too?"). Matching any of them sends the query
+# through the LLM rewrite; otherwise it is treated as standalone.
+_REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|theirs|he|she|him|her|his|hers|"
+    r"there|then|above|previous|previously|earlier|same|former|latter|such|also|too|"
+    r"else|another|other|more|instead)\b",
+    re.IGNORECASE,
+)
+_FOLLOW_UP_PREFIX = re.compile(r"^\s*(and|or|but|so|what about|how about|why|why not|what if)\b", re.IGNORECASE)
+_MIN_STANDALONE_WORDS = 4
+
+
+def needs_rewrite(query: str) -> bool:
+    """Cheap local check for unresolved references in a follow-up query."""
+    if len(query.split()) < _MIN_STANDALONE_WORDS:
+        return True
+    if _FOLLOW_UP_PREFIX.search(query):
+        return True
+    return bool(_REFERENCE_PATTERN.search(query))
+
+
+class AdaptiveQuestionRewriter:
+    """
+    Conditional front stage for the LCEL chain.
+
+    The contextualize prompt is only sent to the LLM when there is chat
+    history *and* the query looks like it depends on it. Rewrites are cached
+    per (history tail, query), and counters record how often the LLM round
+    trip was avoided.
+    """
+
+    def __init__(
+        self,
+        rewrite_chain: Runnable,
+        *,
+        mode: str = "adaptive",
+        history_tail: int = 4,
+        cache_size: int = 1024,
+    ):
+        if mode not in {"always", "adaptive"}:
+            raise ValueError(f"Unsupported rewrite mode: {mode}")
+
+        self.rewrite_chain = rewrite_chain
+        self.mode = mode
+        self.history_tail = history_tail
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "total": 0,
+            "skipped_no_history": 0,
+            "skipped_standalone": 0,
+            "cache_hits": 0,
+            "llm_rewrites": 0,
+        }
+
+    def _cache_key(self, query: str, chat_history: List[BaseMessage]) -> Tuple:
+        tail = chat_history[-self.history_tail:] if self.history_tail else []
+        return (
+            tuple((getattr(m, "type", ""), str(getattr(m, "content", m))) for m in tail),
+            query.strip(),
+        )
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _shortcut(self, query: str, chat_history: List[BaseMessage]):
+        """Return (answer, cache_key); answer is None when the LLM is needed."""
+        self._count("total")
+
+        if self.mode == "adaptive":
+            if not chat_history:
+                self._count("skipped_no_history")
+                return query, None
+            if not needs_rewrite(query):
+                self._count("skipped_standalone")
+                return query, None
+
+        key = self._cache_key(query, chat_history or [])
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return cached, key
+
+        return None, key
+
+    def _remember(self, key: Tuple, rewritten: str) -> None:
+        self._count("llm_rewrites")
+        with self._lock:
+            self._cache[key] = rewritten
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rewrite(self, inputs: Dict[str, Any], config: Optional[RunnableConfig] = None) -> str:
+        query = inputs["input"]
+        chat_history = inputs.get("rewrite_history", inputs.get("chat_history")) or []
+
+        answer, key = self._shortcut(query, chat_history)
+        if answer is not None:
+            return answer
+
+        rewritten = self.rewrite_chain.invoke({"input": query, "chat_history": chat_history}, config)
+        self._remember(key, rewritten)
+        return rewritten
+
+    async def arewrite(self, inputs: Dict[str, Any], config: Optional[RunnableConfig] = None) -> str:
+        query = inputs["input"]
+        chat_history = inputs.get("rewrite_history", inputs.get("chat_history")) or []
+
+        answer, key = self._shortcut(query, chat_history)
+        if answer is not None:
+            return answer
+
+        rewritten = await self.rewrite_chain.ainvoke({"input": query, "chat_history": chat_history}, config)
+        self._remember(key, rewritten)
+        return rewritten
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+
+        skipped = stats["skipped_no_history"] + stats["skipped_standalone"] + stats["cache_hits"]
+        stats["llm_calls_saved"] = skipped
+        stats["skip_rate"] = (skipped / stats["total"]) if stats["total"] else None
+        return stats
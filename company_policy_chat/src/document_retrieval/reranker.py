@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List
+
+from langchain_core.documents import Document
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders a retriever's candidates with a local cross-encoder.
+
+    Candidates are scored in batches of ``batch_size``. Before each batch the
+    elapsed time is checked against ``budget_ms``; once the budget is spent
+    scoring stops, the scored candidates are ranked by score and any
+    unscored ones follow in their original retriever order. The best
+    ``top_n`` are passed on to the QA prompt.
+    """
+
+    def __init__(
+        self,
+        model,
+        *,
+        top_n: int = 5,
+        batch_size: int = 8,
+        budget_ms: float = 150.0,
+    ):
+        self.model = model
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.truncated = 0
+        self.calls = 0
+
+    def _score(self, query: str, texts: List[str]) -> List[float]:
+        return [float(score) for score in self.model.rerank(query, texts, batch_size=len(texts))]
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Document]:
+        if len(docs) <= 1:
+            return docs[: self.top_n]
+
+        start = time.perf_counter()
+        scores: List[float] = []
+
+        for offset in range(0, len(docs), self.batch_size):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if scores and elapsed_ms >= self.budget_ms:
+                self.truncated += 1
+                log.warning(
+                    "Rerank budget exhausted",
+                    scored=len(scores),
+                    candidates=len(docs),
+                    elapsed_ms=round(elapsed_ms, 2),
+                )
+                break
+
+            batch = docs[offset: offset + self.batch_size]
+            scores.extend(self._score(query, [doc.page_content for doc in batch]))
+
+        self.calls += 1
+        scored = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        order = scored + list(range(len(scores), len(docs)))
+
+        log.info(
+            "Rerank finished",
+            candidates=len(docs),
+            scored=len(scores),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        return [docs[i] for i in order[: self.top_n]]
+
+    def rerank_payload(self, payload: Dict[str, Any]) -> List[Document]:
+        """LCEL adapter: expects ``{"query": str, "docs": List[Document]}``."""
+        return self.rerank(payload["query"], payload["docs"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "budget_truncated": self.truncated}
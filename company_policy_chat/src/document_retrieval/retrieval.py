@@ -1,34 +1,78 @@
 from __future__ import annotations
+import asyncio
 import os
+import threading
+import time
 import traceback
+from dataclasses import dataclass
 from operator import itemgetter
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional, Sequence, Tuple
 
 from langchain_core.messages import BaseMessage
 from langchain_core.messages import HumanMessage, AIMessage
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.vectorstores import FAISS
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnablePassthrough
 
-from company_policy_chat.utils.model_loader import ModelLoader
+from company_policy_chat.utils.registry import get_registry
 from company_policy_chat.logger.custom_logger import CustomLogger
 from company_policy_chat.utils.config_loader import load_config
-from company_policy_chat.prompts.prompts_library import CONTEXT_QA_PROMPT, CONTEXTUALIZE_QUESTION_PROMPT
+from company_policy_chat.utils.metrics import span
+from company_policy_chat.prompts.prompts_library import (
+    CONTEXT_QA_PROMPT,
+    CONTEXTUALIZE_QUESTION_PROMPT,
+    SUMMARIZE_HISTORY_PROMPT,
+)
+from company_policy_chat.src.document_retrieval.instrumentation import RequestTimer
+from company_policy_chat.src.document_retrieval.query_rewriter import AdaptiveQuestionRewriter
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from company_policy_chat.src.document_retrieval.batch_search import BatchAnswer
+    from company_policy_chat.src.document_retrieval.answer_cache import SemanticAnswerCache
+    from company_policy_chat.src.document_retrieval.context_packer import ContextPacker
+    from company_policy_chat.src.document_retrieval.history_manager import ChatHistoryManager, CompactedHistory
+    from company_policy_chat.src.document_retrieval.reranker import CrossEncoderReranker
 
-config = load_config()
 log = CustomLogger().get_logger(__name__)
 
+
+@dataclass(frozen=True)
+class _Chains:
+    """Everything built from one loaded index; swapped in as one reference."""
+
+    retriever: Any
+    generate_chain: Any
+    answer_chain: Any
+    chain: Any
+    version: Optional[str] = None
+
 class Retrieval:
 
 
     def __init__(self):
         self.chat_history: List[BaseMessage] = []
-        self.chain = None
-        self.retriever = None
+        self._chains: Optional[_Chains] = None
+        self.question_rewriter: Optional[AdaptiveQuestionRewriter] = None
+        self.answer_cache: Optional[SemanticAnswerCache] = None
+        self.reranker: Optional[CrossEncoderReranker] = None
+        self.context_packer: Optional[ContextPacker] = None
+        self.history_manager: Optional[ChatHistoryManager] = None
+        self.index_paths: List[str] = []
+        self.index_name = "index"
+        self._load_args: Dict[str, Any] = {}
+        self._reload_lock = threading.Lock()
+        self._reload_stop = threading.Event()
+        self._reload_thread: Optional[threading.Thread] = None
 
         try:
             self.llm = self._load_llm()
+            self.answer_cache = self._load_answer_cache()
+            self.reranker = self._load_reranker()
+            self.context_packer = self._load_context_packer()
+            self.history_manager = self._load_history_manager()
             self.contextualize_prompt: ChatPromptTemplate = CONTEXTUALIZE_QUESTION_PROMPT
             self.qa_prompt: ChatPromptTemplate = CONTEXT_QA_PROMPT
             log.info("Retrieval class initialized successfully")
@@ -36,46 +80,125 @@ class Retrieval:
             log.error(f"Failed to initialize Retrieval class: {e}")
             raise
 
+    @property
+    def chain(self):
+        return self._chains.chain if self._chains else None
+
+    @property
+    def answer_chain(self):
+        return self._chains.answer_chain if self._chains else None
+
+    @property
+    def generate_chain(self):
+        return self._chains.generate_chain if self._chains else None
+
+    @property
+    def retriever(self):
+        return self._chains.retriever if self._chains else None
+
+    @property
+    def _loaded_version(self) -> Optional[str]:
+        return self._chains.version if self._chains else None
+
     def load_retriever_from_faiss(
         self,
         index_path: str,
-        k: int = config["retriever"]["k"],
-        search_type: str = config["retriever"]["search_type"],
-        fetched_k: int = config["retriever"]["fetched_k"],
+        k: Optional[int] = None,
+        search_type: Optional[str] = None,
+        fetched_k: Optional[int] = None,
         index_name: str = "index",  
-        lambda_mult: float = config["retriever"]["lambda_mult"],
+        lambda_mult: Optional[float] = None,
+        collections: Optional[Sequence[str]] = None,
+        auto_reload: Optional[bool] = None,
     ):
-        
+        """Load a single FAISS index, or fan out over collection shards.
+
+        With ``collections`` set, ``index_path`` is the base directory holding
+        one sub-directory per collection; pass ``["*"]`` to search all of them
+        (re-resolved on every reload check, so shards added later are picked up).
+
+        The retriever and chains are built aside and swapped in together, so
+        requests already in flight finish on the snapshot they started with.
+        With ``auto_reload`` (default: ``snapshots.hot_reload``) a background
+        thread re-runs this load whenever ingestion publishes a new snapshot.
+        """
+        load_args = dict(
+            index_path=index_path,
+            k=k,
+            search_type=search_type,
+            fetched_k=fetched_k,
+            index_name=index_name,
+            lambda_mult=lambda_mult,
+            collections=collections,
+        )
         try:
+            retriever_cfg = load_config()["retriever"]
+            k = k if k is not None else retriever_cfg["k"]
+            search_type = search_type or retriever_cfg["search_type"]
+            fetched_k = fetched_k if fetched_k is not None else retriever_cfg["fetched_k"]
+            lambda_mult = lambda_mult if lambda_mult is not None else retriever_cfg["lambda_mult"]
+
+            if self.reranker is not None:
+                # Retrieve a wider candidate set; the reranker cuts it back to top_n.
+                k = max(k, load_config().get("reranker", {}).get("candidate_k", 20))
+                fetched_k = max(fetched_k, k)
+
             if not os.path.isdir(index_path):
                 raise FileNotFoundError(f"FAISS index directory not found: {index_path}")
 
-            if search_type not in {"similarity", "mmr"}:
+            if search_type not in {"similarity", "mmr", "hybrid"}:
                 raise ValueError(f"Unsupported search_type: {search_type}")
 
-            embeddings = ModelLoader().load_embedding()
-
-            
-            vectorstore = FAISS.load_local(
-                folder_path=index_path,
-                embeddings=embeddings,
-                index_name=index_name,
-                allow_dangerous_deserialization=True
-            )
-
-            
-            if search_type == "mmr":
-                search_kwargs = {"fetch_k": fetched_k, "lambda_mult": lambda_mult, "k": k}
+            if collections and search_type == "hybrid":
+                raise ValueError("hybrid search_type is not supported across collections")
+
+            registry = get_registry()
+            if collections:
+                retriever, index_paths, versions = self._load_sharded_retriever(
+                    index_path,
+                    collections,
+                    index_name=index_name,
+                    search_type=search_type,
+                    k=k,
+                    fetch_k=fetched_k,
+                    lambda_mult=lambda_mult,
+                    max_workers=retriever_cfg.get("shard_workers", 8),
+                )
+            elif search_type == "hybrid":
+                retriever, version = self._load_hybrid_retriever(
+                    index_path,
+                    index_name=index_name,
+                    k=k,
+                    hybrid_cfg=retriever_cfg.get("hybrid", {}),
+                )
+                index_paths, versions = [index_path], [version]
             else:
-                search_kwargs = {"k": k}
-
-            self.retriever = vectorstore.as_retriever(
-                search_type=search_type,
-                search_kwargs=search_kwargs
-            )
-
-            self._build_lcel_chain()
-            log.info("FAISS retriever loaded successfully")
+                version, _, vectorstore = registry.get_snapshot(index_path, index_name)
+
+                
+                if search_type == "mmr":
+                    search_kwargs = {"fetch_k": fetched_k, "lambda_mult": lambda_mult, "k": k}
+                else:
+                    search_kwargs = {"k": k}
+
+                retriever = vectorstore.as_retriever(
+                    search_type=search_type,
+                    search_kwargs=search_kwargs
+                )
+                index_paths, versions = [index_path], [version]
+
+            # Versions of the stores actually loaded, not re-read afterwards.
+            loaded_version = "|".join(versions)
+            with self._reload_lock:
+                self._build_lcel_chain(retriever, loaded_version)
+                self.index_paths = index_paths
+                self.index_name = index_name
+                self._load_args = load_args
+            log.info("FAISS retriever loaded successfully", version=loaded_version)
+
+            snapshot_cfg = load_config().get("snapshots", {})
+            if auto_reload if auto_reload is not None else snapshot_cfg.get("hot_reload", False):
+                self.start_auto_reload(snapshot_cfg.get("reload_interval_s"))
 
         except Exception as e:
             log.error(f"Failed to load retriever from FAISS: {e}")
@@ -87,18 +210,64 @@ class Retrieval:
 
     def invoke(self, user_input: str, chat_history:BaseMessage) -> str:
         
+        timer = RequestTimer()
         try:
-            if self.chain is None:
-                raise ValueError("LCEL chain not initialized. Call load_retriever_from_faiss() first.")
+            # One read: a reload swapping chains mid-request cannot mix snapshots.
+            chains = self._require_chain()
+            payload = self._payload(user_input, chat_history, timer.config())
 
-           
-            payload = {
-                "input": user_input,
-                "chat_history": chat_history
-            }
+            if self.answer_cache is None:
+                answer = chains.chain.invoke(payload, config=timer.config())
+            else:
+                started = time.perf_counter()
+                cached, lookup = self._lookup_answer(payload, chains.version, timer.config())
+                timer.add_stage("cache_lookup", (time.perf_counter() - started) * 1000)
+                if cached is not None:
+                    timer.path = "cache_hit"
+                    timer.finish()
+                    return cached
+
+                timer.path = "cache_miss"
+                answer = chains.answer_chain.invoke(lookup["payload"], config=timer.config())
+                self._store_answer(lookup, answer)
+
+            timer.finish()
+            if not answer:
+                log.warning("Answer not generated")
+                return "Answer not generated."
+
+            return answer
 
-            answer = self.chain.invoke(payload)
+        except Exception as e:
+            timer.finish(status="error")
+            log.error(f"Failed to invoke retrieval: {e}")
+            traceback.print_exc()
+            raise
+
+
+    async def ainvoke(self, user_input: str, chat_history: List[BaseMessage]) -> str:
+        """Async counterpart of ``invoke``; runs on the caller's event loop."""
+        timer = RequestTimer()
+        try:
+            chains = self._require_chain()
+            payload = await self._apayload(user_input, chat_history, timer.config())
 
+            if self.answer_cache is None:
+                answer = await chains.chain.ainvoke(payload, config=timer.config())
+            else:
+                started = time.perf_counter()
+                cached, lookup = await self._alookup_answer(payload, chains.version, timer.config())
+                timer.add_stage("cache_lookup", (time.perf_counter() - started) * 1000)
+                if cached is not None:
+                    timer.path = "cache_hit"
+                    timer.finish()
+                    return cached
+
+                timer.path = "cache_miss"
+                answer = await chains.answer_chain.ainvoke(lookup["payload"], config=timer.config())
+                await asyncio.to_thread(self._store_answer, lookup, answer)
+
+            timer.finish()
             if not answer:
                 log.warning("Answer not generated")
                 return "Answer not generated."
@@ -106,15 +275,477 @@ class Retrieval:
             return answer
 
         except Exception as e:
-            log.error(f"Failed to invoke retrieval: {e}")
+            timer.finish(status="error")
+            log.error(f"Failed to invoke retrieval asynchronously: {e}")
             traceback.print_exc()
             raise
 
+    async def astream(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage],
+    ) -> AsyncIterator[str]:
+        """Yield the final answer token by token as the LLM produces it.
+
+        The question rewrite and retrieval still complete first; only the
+        answer generation is streamed, which is what sets time-to-first-token.
+        """
+        timer = RequestTimer(path="stream")
+        try:
+            chains = self._require_chain()
+            chain = chains.chain
+            payload = await self._apayload(user_input, chat_history, timer.config())
+            produced = False
+            lookup = None
+
+            if self.answer_cache is not None:
+                started = time.perf_counter()
+                cached, lookup = await self._alookup_answer(payload, chains.version, timer.config())
+                timer.add_stage("cache_lookup", (time.perf_counter() - started) * 1000)
+                if cached is not None:
+                    timer.path = "cache_hit"
+                    timer.finish()
+                    yield cached
+                    return
+                chain, payload = chains.answer_chain, lookup["payload"]
+
+            tokens: List[str] = []
+            async for token in chain.astream(payload, config=timer.config()):
+                if token:
+                    produced = True
+                    tokens.append(token)
+                    yield token
+
+            if lookup is not None:
+                await asyncio.to_thread(self._store_answer, lookup, "".join(tokens))
+
+            timer.finish()
+            if not produced:
+                log.warning("Answer not generated")
+                yield "Answer not generated."
+
+        except Exception as e:
+            timer.finish(status="error")
+            log.error(f"Failed to stream retrieval: {e}")
+            traceback.print_exc()
+            raise
+
+    def batch(
+        self,
+        questions: Sequence[str],
+        histories: Optional[Sequence[List[BaseMessage]]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[BatchAnswer]:
+        """Answer many questions at once, e.g. for evaluation runs.
+
+        Rewrites and LLM calls run concurrently (at most ``max_concurrency``
+        in flight), the standalone questions are embedded in one call and the
+        index is searched with one batched matrix search. Results keep the
+        input order; a failing item carries its ``error`` instead of aborting
+        the batch.
+        """
+        from company_policy_chat.src.document_retrieval.batch_search import BatchAnswer, embed_queries, unit_rows
+
+        chains = self._require_chain()
+        histories = list(histories) if histories is not None else [[] for _ in questions]
+        if len(histories) != len(questions):
+            raise ValueError("questions and histories must have the same length")
+
+        max_concurrency = max_concurrency or load_config().get("batch", {}).get("max_concurrency", 8)
+        config: RunnableConfig = {"max_concurrency": max_concurrency}
+        results = [BatchAnswer(question=q) for q in questions]
+        payloads = [self._payload(q, h) for q, h in zip(questions, histories)]
+
+        def fail(i: int, error: BaseException) -> None:
+            results[i].error = f"{type(error).__name__}: {error}"
+
+        with span("batch_rewrite", questions=len(payloads)):
+            rewritten = RunnableLambda(self.question_rewriter.rewrite).batch(
+                payloads, config=config, return_exceptions=True
+            )
+
+        live: List[int] = []
+        for i, standalone in enumerate(rewritten):
+            if isinstance(standalone, Exception):
+                fail(i, standalone)
+            else:
+                live.append(i)
+
+        with span("batch_embed", queries=len(live)):
+            vectors = embed_queries(get_registry().get_embeddings(), [rewritten[i] for i in live])
+
+        version = chains.version
+        if self.answer_cache is not None and live:
+            unit = unit_rows(vectors)
+            misses = []
+            for row, i in enumerate(live):
+                cached = self.answer_cache.lookup(rewritten[i], version, unit[row])
+                if cached is not None:
+                    results[i].answer, results[i].cached = cached, True
+                else:
+                    misses.append(row)
+            live, vectors, unit = [live[r] for r in misses], vectors[misses], unit[misses]
+
+        with span("batch_retrieve", queries=len(live)):
+            found = self._retrieve_batch(chains.retriever, [rewritten[i] for i in live], vectors, config)
+
+        contexts: Dict[int, str] = {}
+        for i, docs in zip(live, found):
+            if isinstance(docs, Exception):
+                fail(i, docs)
+                continue
+            try:
+                if self.reranker is not None:
+                    docs = self.reranker.rerank(rewritten[i], docs)
+                contexts[i] = self._build_context(docs)
+            except Exception as e:
+                fail(i, e)
+
+        row_of = {i: row for row, i in enumerate(live)}
+        pending = list(contexts)
+        with span("batch_generate", requests=len(pending), max_concurrency=max_concurrency):
+            answers = chains.generate_chain.batch(
+                [{**payloads[i], "context": contexts[i]} for i in pending],
+                config=config,
+                return_exceptions=True,
+            )
+
+        for i, answer in zip(pending, answers):
+            if isinstance(answer, Exception):
+                fail(i, answer)
+                continue
+            results[i].answer = answer or "Answer not generated."
+            if answer and self.answer_cache is not None:
+                self.answer_cache.store(rewritten[i], answer, version, unit[row_of[i]])
+
+        log.info(
+            "Batch finished",
+            questions=len(results),
+            failed=sum(1 for r in results if not r.ok),
+            cached=sum(1 for r in results if r.cached),
+        )
+        return results
+
+    def _retrieve_batch(
+        self,
+        retriever,
+        queries: List[str],
+        vectors: np.ndarray,
+        config: RunnableConfig,
+    ) -> List[Any]:
+        """Documents per query, or the exception raised for that query."""
+        from langchain_core.vectorstores import VectorStoreRetriever
+
+        from company_policy_chat.src.document_retrieval.batch_search import search_batch
+        from company_policy_chat.src.document_retrieval.sharded_retriever import ShardedRetriever
+
+        if not queries:
+            return []
+
+        try:
+            if isinstance(retriever, VectorStoreRetriever) and retriever.search_type in {"similarity", "mmr"}:
+                return search_batch(
+                    retriever.vectorstore,
+                    vectors,
+                    search_type=retriever.search_type,
+                    **retriever.search_kwargs,
+                )
+            if isinstance(retriever, ShardedRetriever):
+                return [retriever.search_by_vector(vector) for vector in vectors]
+        except Exception as e:
+            log.error(f"Batched search failed: {e}")
+            return [e] * len(queries)
+
+        # Hybrid search needs the query text for the lexical side.
+        return retriever.batch(queries, config=config, return_exceptions=True)
+
+    def rewrite_stats(self) -> Dict[str, Any]:
+        """How often the question-rewrite LLM call was skipped or served from cache."""
+        return self.question_rewriter.stats() if self.question_rewriter else {}
+
+    def answer_cache_stats(self) -> Dict[str, Any]:
+        return self.answer_cache.stats() if self.answer_cache else {}
+
+    def history_stats(self) -> Dict[str, Any]:
+        """Chat-history tokens received vs. sent to the QA prompt, and summaries written."""
+        return self.history_manager.stats() if self.history_manager else {}
+
+    def context_stats(self) -> Dict[str, Any]:
+        """Prompt tokens spent on context and saved by overlap merging / the budget."""
+        return self.context_packer.stats() if self.context_packer else {}
+
+    def _load_sharded_retriever(
+        self,
+        base_path: str,
+        collections: Sequence[str],
+        *,
+        index_name: str,
+        **retriever_kwargs,
+    ):
+        from company_policy_chat.src.document_retrieval.sharded_retriever import (
+            ShardedRetriever,
+            list_collections,
+        )
+
+        names = list_collections(base_path, index_name) if "*" in collections else list(collections)
+        if not names:
+            raise FileNotFoundError(f"No FAISS collections found under: {base_path}")
+
+        registry = get_registry()
+        index_paths = [os.path.join(base_path, name) for name in names]
+        entries = [registry.get_snapshot(path, index_name) for path in index_paths]
+        shards = {name: entry[2] for name, entry in zip(names, entries)}
+
+        log.info("Sharded retriever loaded", collections=names)
+        retriever = ShardedRetriever(
+            shards=shards,
+            embeddings=registry.get_embeddings(),
+            **retriever_kwargs,
+        )
+        return retriever, index_paths, [entry[0] for entry in entries]
+
+    def _load_hybrid_retriever(
+        self,
+        index_path: str,
+        *,
+        index_name: str,
+        k: int,
+        hybrid_cfg: Dict[str, Any],
+    ):
+        from company_policy_chat.src.document_ingestion.lexical_index import LexicalIndex
+        from company_policy_chat.src.document_retrieval.hybrid_retriever import HybridRetriever
+
+        # Read BM25 postings from the same snapshot the vectors came from.
+        version, snapshot_dir, vectorstore = get_registry().get_snapshot(index_path, index_name)
+        lexical_index = LexicalIndex(snapshot_dir, read_only=True)
+        if not lexical_index.exists():
+            raise FileNotFoundError(
+                f"Lexical index not found in {snapshot_dir}; re-run ingestion to build it"
+            )
+
+        retriever = HybridRetriever(
+            vectorstore=vectorstore,
+            lexical_index=lexical_index,
+            k=k,
+            fetch_k=max(k, hybrid_cfg.get("fetch_k", 20)),
+            rrf_k=hybrid_cfg.get("rrf_k", 60),
+        )
+        return retriever, version
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild the retriever when a newer index snapshot has been published."""
+        if not self._load_args:
+            return False
+        try:
+            if not self._collections_changed() and self._index_version() == self._loaded_version:
+                return False
+        except FileNotFoundError:
+            return False
+
+        previous = self._loaded_version
+        self.load_retriever_from_faiss(**self._load_args, auto_reload=False)
+        log.info("Index reloaded", previous=previous, version=self._loaded_version)
+        return True
+
+    def _collections_changed(self) -> bool:
+        """Whether ``["*"]`` now resolves to a different set of shards."""
+        collections = self._load_args.get("collections")
+        if not collections or "*" not in collections:
+            return False
+
+        from company_policy_chat.src.document_retrieval.sharded_retriever import list_collections
+
+        base_path = self._load_args["index_path"]
+        names = list_collections(base_path, self.index_name)
+        return bool(names) and [os.path.join(base_path, name) for name in names] != self.index_paths
+
+    def start_auto_reload(self, interval_s: Optional[float] = None) -> None:
+        """Poll for newly published snapshots in a daemon thread."""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return
+        interval_s = interval_s or load_config().get("snapshots", {}).get("reload_interval_s", 5)
+        self._reload_stop.clear()
+        self._reload_thread = threading.Thread(
+            target=self._watch_index,
+            args=(interval_s,),
+            name="index-reload",
+            daemon=True,
+        )
+        self._reload_thread.start()
+
+    def stop_auto_reload(self) -> None:
+        self._reload_stop.set()
+        if self._reload_thread is not None:
+            self._reload_thread.join()
+            self._reload_thread = None
+
+    def _watch_index(self, interval_s: float) -> None:
+        while not self._reload_stop.wait(interval_s):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                # Keep serving the loaded snapshot; the next poll retries.
+                log.error("Index reload failed", error=str(e))
+
+    def _index_version(self) -> str:
+        registry = get_registry()
+        return "|".join(registry.index_version(path, self.index_name) for path in self.index_paths)
+
+    def _load_reranker(self) -> Optional[CrossEncoderReranker]:
+        rerank_cfg = load_config().get("reranker", {})
+        if not rerank_cfg.get("enabled", False):
+            return None
+
+        from company_policy_chat.src.document_retrieval.reranker import CrossEncoderReranker
+
+        return CrossEncoderReranker(
+            get_registry().get_reranker(),
+            top_n=rerank_cfg.get("top_n", load_config()["retriever"]["k"]),
+            batch_size=rerank_cfg.get("batch_size", 8),
+            budget_ms=rerank_cfg.get("budget_ms", 150),
+        )
+
+    def _load_context_packer(self) -> Optional[ContextPacker]:
+        context_cfg = load_config().get("context", {})
+        if not context_cfg.get("enabled", True):
+            return None
+
+        from company_policy_chat.src.document_retrieval.context_packer import ContextPacker
+
+        return ContextPacker(
+            max_tokens=context_cfg.get("max_tokens", 3000),
+            chars_per_token=context_cfg.get("chars_per_token", 4.0),
+            min_overlap_chars=context_cfg.get("min_overlap_chars", 20),
+        )
+
+    def _load_history_manager(self) -> Optional[ChatHistoryManager]:
+        history_cfg = load_config().get("chat_history", {})
+        if not history_cfg.get("enabled", True):
+            return None
+
+        from company_policy_chat.src.document_retrieval.history_manager import ChatHistoryManager
+
+        summarize_chain = (
+            SUMMARIZE_HISTORY_PROMPT
+            | self.llm.with_config(run_name="summarize_history")
+            | StrOutputParser()
+        )
+        return ChatHistoryManager(
+            summarize_chain,
+            keep_turns=history_cfg.get("keep_turns", 4),
+            fold_turns=history_cfg.get("fold_turns", 2),
+            rewrite_turns=history_cfg.get("rewrite_turns", 2),
+            max_tokens=history_cfg.get("max_tokens", 1500),
+            chars_per_token=load_config().get("context", {}).get("chars_per_token", 4.0),
+        )
+
+    def _load_answer_cache(self) -> Optional[SemanticAnswerCache]:
+        cache_cfg = load_config().get("answer_cache", {})
+        if not cache_cfg.get("enabled", False):
+            return None
+
+        from company_policy_chat.src.document_retrieval.answer_cache import SemanticAnswerCache
+
+        exact_text = cache_cfg.get("exact_text", True)
+        log.info(
+            "Semantic answer cache enabled",
+            threshold=cache_cfg.get("similarity_threshold", 0.95),
+            exact_text=exact_text,
+        )
+        if not exact_text:
+            log.warning("Answer cache matches on similarity alone; near-identical questions may share answers")
+        return SemanticAnswerCache(
+            get_registry().get_embeddings(),
+            threshold=cache_cfg.get("similarity_threshold", 0.95),
+            ttl_seconds=cache_cfg.get("ttl_seconds", 3600),
+            max_entries=cache_cfg.get("max_entries", 2048),
+            exact_text=exact_text,
+        )
+
+    def _lookup_answer(
+        self,
+        payload: Dict[str, Any],
+        version: Optional[str],
+        config: Optional[RunnableConfig] = None,
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Rewrite the question once and check the semantic cache with it."""
+        standalone = self.question_rewriter.rewrite(payload, config)
+        return self._check_answer_cache(payload, standalone, version)
+
+    async def _alookup_answer(
+        self,
+        payload: Dict[str, Any],
+        version: Optional[str],
+        config: Optional[RunnableConfig] = None,
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        standalone = await self.question_rewriter.arewrite(payload, config)
+        return await asyncio.to_thread(self._check_answer_cache, payload, standalone, version)
+
+    def _check_answer_cache(
+        self,
+        payload: Dict[str, Any],
+        standalone: str,
+        version: Optional[str],
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        # Keyed by the version the answering chain was built from, not the
+        # one on disk, which may already be newer than the loaded chain.
+        vector = self.answer_cache.embed(standalone)
+
+        lookup = {
+            "payload": {**payload, "standalone_question": standalone},
+            "question": standalone,
+            "vector": vector,
+            "version": version,
+        }
+        return self.answer_cache.lookup(standalone, version, vector), lookup
+
+    def _store_answer(self, lookup: Dict[str, Any], answer: str) -> None:
+        if answer:
+            self.answer_cache.store(lookup["question"], answer, lookup["version"], lookup["vector"])
+
+    def _require_chain(self) -> _Chains:
+        chains = self._chains
+        if chains is None:
+            raise ValueError("LCEL chain not initialized. Call load_retriever_from_faiss() first.")
+        return chains
+
+    def _payload(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage],
+        config: Optional[RunnableConfig] = None,
+    ) -> Dict[str, Any]:
+        if self.history_manager is None:
+            return {
+                "input": user_input,
+                "chat_history": chat_history,
+            }
+        return Retrieval._compacted_payload(user_input, self.history_manager.compact(chat_history, config))
+
+    async def _apayload(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage],
+        config: Optional[RunnableConfig] = None,
+    ) -> Dict[str, Any]:
+        if self.history_manager is None:
+            return self._payload(user_input, chat_history)
+        compacted = await self.history_manager.acompact(chat_history, config)
+        return Retrieval._compacted_payload(user_input, compacted)
+
+    @staticmethod
+    def _compacted_payload(user_input: str, compacted: CompactedHistory) -> Dict[str, Any]:
+        # The QA prompt sees summary + recent turns; the rewriter only the last few turns.
+        return {
+            "input": user_input,
+            "chat_history": compacted.qa,
+            "rewrite_history": compacted.rewrite,
+        }
 
     def _load_llm(self):
         
         try:
-            llm = ModelLoader().load_llm()
+            llm = get_registry().get_llm()
             if not llm:
                 raise ValueError("LLM could not be loaded")
 
@@ -126,47 +757,87 @@ class Retrieval:
             traceback.print_exc()
             raise
 
+    def _build_context(self, docs) -> str:
+        if self.context_packer is None:
+            return Retrieval._format_docs(docs)
+        return self.context_packer.pack_text(docs)
+
     @staticmethod
     def _format_docs(docs) -> str:
        
         return "\n\n".join(getattr(d, "page_content", str(d)) for d in docs)
 
-    def _build_lcel_chain(self):
+    def _build_lcel_chain(self, retriever=None, version: Optional[str] = None):
         
         try:
-            if self.retriever is None:
+            retriever = retriever if retriever is not None else self.retriever
+            if retriever is None:
                 raise ValueError("Retriever must be set before building LCEL chain")
 
             
-            question_rewriter = (
+            rewrite_chain = (
                 {
                     "input": itemgetter("input"),
                     "chat_history": itemgetter("chat_history"),
                 }
                 | self.contextualize_prompt
-                | self.llm
+                | self.llm.with_config(run_name="rewrite_llm")
                 | StrOutputParser()
             )
 
+            if self.question_rewriter is None:
+                # Kept across index reloads; rewrites do not depend on the index.
+                rewrite_cfg = load_config().get("query_rewrite", {})
+                self.question_rewriter = AdaptiveQuestionRewriter(
+                    rewrite_chain,
+                    mode=rewrite_cfg.get("mode", "adaptive"),
+                    history_tail=rewrite_cfg.get("history_tail", 4),
+                    cache_size=rewrite_cfg.get("cache_size", 1024),
+                )
+            question_rewriter = RunnableLambda(
+                self.question_rewriter.rewrite,
+                afunc=self.question_rewriter.arewrite,
+            ).with_config(run_name="rewrite")
+
             
-            retrieved_docs = (
-                question_rewriter
-                | self.retriever
-                | Retrieval._format_docs
+            candidate_docs = itemgetter("standalone_question") | retriever
+            if self.reranker is not None:
+                candidate_docs = (
+                    {
+                        "query": itemgetter("standalone_question"),
+                        "docs": candidate_docs,
+                    }
+                    | RunnableLambda(self.reranker.rerank_payload).with_config(run_name="rerank")
+                )
+
+            retrieved_docs = candidate_docs | RunnableLambda(self._build_context).with_config(
+                run_name="pack_context"
             )
 
             
-            self.chain = (
+            generate_chain = (
+                self.qa_prompt
+                | self.llm.with_config(run_name="generate")
+                | StrOutputParser()
+            )
+
+            answer_chain = (
                 {
                     "context": retrieved_docs,
                     "input": itemgetter("input"),
                     "chat_history": itemgetter("chat_history"),
                 }
-                | self.qa_prompt
-                | self.llm
-                | StrOutputParser()
+                | generate_chain
             )
 
+            chain = (
+                RunnablePassthrough.assign(standalone_question=question_rewriter)
+                | answer_chain
+            )
+
+            # Swap everything at once so no request mixes old and new pieces.
+            self._chains = _Chains(retriever, generate_chain, answer_chain, chain, version)
+
             log.info("LCEL chain built successfully")
 
         except Exception as e:
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, PrivateAttr
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+from company_policy_chat.src.document_ingestion import snapshots
+from company_policy_chat.utils.metrics import get_metrics
+
+log = CustomLogger().get_logger(__name__)
+
+
+def list_collections(base_dir: str, index_name: str = "index") -> List[str]:
+    """Names of the collection shards (sub-directories holding an index) under ``base_dir``."""
+    base = Path(base_dir)
+    if not base.is_dir():
+        return []
+    return sorted(p.name for p in base.iterdir() if p.is_dir() and snapshots.has_index(p, index_name))
+
+
+class ShardedRetriever(BaseRetriever):
+    """
+    Fan a query out to several independent FAISS shards and merge the hits.
+
+    The query is embedded once; every shard is searched for ``fetch_k``
+    candidates on a thread pool (FAISS releases the GIL during search).
+    Candidates are merged on raw L2 distance, which is comparable across
+    shards built with the same embedding model, so the resulting top-k (or
+    MMR selection over the merged pool) is globally correct. Per-shard
+    latencies go to the ``shard_search_ms`` histogram and the request's log
+    event; the retriever keeps no per-request state.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    shards: Dict[str, Any]
+    embeddings: Any
+    search_type: str = "similarity"
+    k: int = 5
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    max_workers: int = 8
+
+    _executor: ThreadPoolExecutor = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(self.shards))),
+            thread_name_prefix="faiss-shard",
+        )
+
+    def _search_shard(self, name: str, vs, query: np.ndarray, n: int) -> Tuple[str, List[Tuple[float, Document, Any]], float]:
+        start = time.perf_counter()
+        distances, positions = vs.index.search(query, min(n, max(vs.index.ntotal, 1)))
+        hits = []
+
+        for distance, pos in zip(distances[0], positions[0]):
+            if pos == -1:
+                continue
+            doc = vs.docstore.search(vs.index_to_docstore_id[int(pos)])
+            if not isinstance(doc, Document):
+                continue
+            doc = doc.model_copy(update={"metadata": {**doc.metadata, "collection": name}})
+            vector = vs.index.reconstruct(int(pos)) if self.search_type == "mmr" else None
+            hits.append((float(distance), doc, vector))
+
+        return name, hits, (time.perf_counter() - start) * 1000
+
+    def search_by_vector(self, query_vector) -> List[Document]:
+        query = np.asarray([query_vector], dtype=np.float32)
+        n = self.fetch_k if self.search_type == "mmr" else self.k
+
+        futures = [
+            self._executor.submit(self._search_shard, name, vs, query, n)
+            for name, vs in self.shards.items()
+        ]
+
+        metrics = get_metrics()
+        merged: List[Tuple[float, Document, Any]] = []
+        latencies: Dict[str, float] = {}
+        for future in futures:
+            name, hits, elapsed_ms = future.result()
+            latencies[name] = round(elapsed_ms, 3)
+            metrics.observe("shard_search_ms", elapsed_ms, {"collection": name})
+            merged.extend(hits)
+
+        log.info("Sharded search finished", shard_latency_ms=latencies, candidates=len(merged))
+
+        merged.sort(key=lambda hit: hit[0])
+
+        if self.search_type != "mmr":
+            return [doc for _, doc, _ in merged[:self.k]]
+
+        from langchain_community.vectorstores.utils import maximal_marginal_relevance
+
+        pool = merged[:self.fetch_k]
+        if not pool:
+            return []
+
+        selected = maximal_marginal_relevance(
+            query[0],
+            [vector for _, _, vector in pool],
+            k=min(self.k, len(pool)),
+            lambda_mult=self.lambda_mult,
+        )
+        return [pool[i][1] for i in selected]
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        return self.search_by_vector(self.embeddings.embed_query(query))
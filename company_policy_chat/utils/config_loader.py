@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 import os
 import yaml
@@ -6,7 +7,9 @@ import yaml
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
+@lru_cache(maxsize=1)
 def load_config()->dict:
+    """Read config.yaml once per process; callers must treat it as read-only."""
 
     config_path = (_project_root()/"config"/"config.yaml")
     path = Path(config_path)
@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+log = logging.getLogger(__name__)
+
+_SQL_BATCH = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Disk-backed cache in front of an embedding model.
+
+    Vectors are stored as packed float32 blobs in SQLite, keyed by a sha256
+    over ``model name + kind + text`` so changing the model never serves
+    stale vectors. Only cache misses reach the wrapped embedder. When the
+    cache grows past ``max_entries`` the least recently used rows are evicted.
+    Reads take no lock and do not write; see ``_fetch`` for how recency is kept.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        model_name: str,
+        cache_path: str,
+        max_entries: int = 200_000,
+        touch_interval_s: float = 600,
+    ):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.touch_interval_s = touch_interval_s
+        self.hits = 0
+        self.misses = 0
+
+        path = Path(cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+
+        # Writes (inserts, eviction, last_used updates) share one connection
+        # under _lock; reads use a connection per thread and take no lock.
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._touch_lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def _key(self, kind: str, text: str) -> str:
+        payload = f"{self.model_name}\x00{kind}\x00{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._path), check_same_thread=False)
+            self._local.conn = conn
+            with self._touch_lock:
+                self._readers.append(conn)
+        return conn
+
+    def _fetch(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        stale_before = now - self.touch_interval_s
+        stale: List[str] = []
+
+        conn = self._reader()
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for key, blob, last_used in rows:
+                found[key] = self._unpack(blob)
+                if last_used < stale_before:
+                    stale.append(key)
+
+        # LRU order only needs to be roughly right: a hit is recorded in memory
+        # when its stored last_used is older than touch_interval_s, and written
+        # with the next insert or once a batch has piled up.
+        if stale:
+            with self._touch_lock:
+                for key in stale:
+                    self._touched[key] = now
+                flush = len(self._touched) >= _SQL_BATCH
+            if flush:
+                with self._lock:
+                    self._flush_touched()
+                    self._conn.commit()
+
+        return found
+
+    def _flush_touched(self) -> None:
+        """Write pending last_used updates; the caller holds ``_lock``."""
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in touched.items()],
+            )
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, self._pack(vector), now) for key, vector in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return
+
+        # Drop a little extra so eviction does not run on every insert.
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        log.info(f"Embedding cache evicted {excess} entries")
+
+    def _embed(self, kind: str, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        cached = self._fetch(list(dict.fromkeys(keys)))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        miss_count = sum(1 for key in keys if key in missing)
+        self.hits += len(keys) - miss_count
+        self.misses += miss_count
+
+        if missing:
+            if kind == "query":
+                vectors = self._embed_uncached_queries(list(missing.values()))
+            else:
+                vectors = self.embedder.embed_documents(list(missing.values()))
+
+            fresh = {key: list(vector) for key, vector in zip(missing, vectors)}
+            self._store(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def _embed_uncached_queries(self, texts: List[str]) -> List[List[float]]:
+        model = getattr(self.embedder, "model", None)
+        if len(texts) > 1 and hasattr(model, "query_embed"):
+            # FastEmbed: one vectorised pass in query mode, same vectors as embed_query.
+            batch_size = getattr(self.embedder, "batch_size", 256)
+            return [vector.tolist() for vector in model.query_embed(texts, batch_size=batch_size)]
+        return [self.embedder.embed_query(text) for text in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("document", texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batched ``embed_query``: cached under the query namespace, misses embedded together."""
+        return self._embed("query", texts)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+        with self._touch_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
@@ -1,21 +1,25 @@
 from pathlib import Path
-from typing import Iterable, List, BinaryIO
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, BinaryIO, Optional, Tuple
+import hashlib
+import multiprocessing
+import os
 import shutil
+import tempfile
 
 from langchain_core.documents import Document
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader,
-    CSVLoader,
-    ToMarkdownLoader
-)
 
-from company_policy_chat.logger.custom_logger import CustomLogger
+from company_policy_chat.logger.custom_logger import CustomLogger, configure_worker_logging, worker_logging_settings
 
 log = CustomLogger().get_logger(__name__)
 
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".csv", ".md"}
+COPY_BUFFER_SIZE = 1024 * 1024
+DEFAULT_PAGES_PER_TASK = 25
 
 
 
@@ -38,84 +42,367 @@ def _get_file_stream(file_obj) -> BinaryIO:
     return file_obj                 
 
 
+@dataclass(frozen=True)
+class SavedFile:
+    """A persisted upload with the content hash computed while copying."""
+    path: Path
+    sha256: str
+    size: int
+
+
+@dataclass(frozen=True)
+class LoadedFile:
+    """Documents parsed from one file, or the reason it could not be parsed."""
+    path: Path
+    documents: List[Document]
+    error: Optional[str] = None
+
+
 def save_uploaded_files(uploaded_files, target_dir: Path) -> List[Path]:
+    return [saved.path for saved in stream_uploaded_files(uploaded_files, target_dir)]
+
+
+def stream_uploaded_files(
+    uploaded_files,
+    target_dir: Path,
+    *,
+    workers: int = 1,
+    buffer_size: int = COPY_BUFFER_SIZE,
+) -> List[SavedFile]:
+    """
+    Copy uploads to disk with a fixed-size buffer, hashing on the fly.
+
+    Each file is written to a temp file in ``target_dir`` and atomically
+    renamed into place, so readers never see a half-written upload. With
+    ``workers > 1`` uploads are copied concurrently on a thread pool.
+    Uploads sharing a file name would race on the same path, so only the
+    last one of each name is kept.
+    """
     target_dir.mkdir(parents=True, exist_ok=True)
-    saved: List[Path] = []
+    file_objs = _last_per_name(uploaded_files)
+
+    if workers > 1 and len(file_objs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda f: _stream_to_disk(f, target_dir, buffer_size), file_objs))
+    else:
+        results = [_stream_to_disk(f, target_dir, buffer_size) for f in file_objs]
+
+    return [saved for saved in results if saved is not None]
 
+
+def _last_per_name(uploaded_files) -> list:
+    by_name: Dict[str, object] = {}
     for file_obj in uploaded_files:
-        filename = _get_filename(file_obj)
-        out_path = target_dir / filename
+        name = _get_filename(file_obj)
+        if name in by_name:
+            log.warning("Duplicate upload file name, keeping the last one", file=name)
+            del by_name[name]
+        by_name[name] = file_obj
+    return list(by_name.values())
+
+
+def _stream_to_disk(file_obj, target_dir: Path, buffer_size: int) -> Optional[SavedFile]:
+    filename = _get_filename(file_obj)
+    out_path = target_dir / filename
+    tmp_path: Optional[str] = None
 
+    try:
+        stream = _get_file_stream(file_obj)
+
+       
         try:
-            stream = _get_file_stream(file_obj)
+            stream.seek(0)
+        except Exception:
+            pass
+
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=f".{filename}.", suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                block = stream.read(buffer_size)
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if size == 0:
+            log.error("Empty file input, skipping", file=filename)
+            os.unlink(tmp_path)
+            return None
+
+        os.replace(tmp_path, out_path)
+        tmp_path = None
+
+        log.info("File saved", file=filename, size=size)
+        return SavedFile(path=out_path, sha256=digest.hexdigest(), size=size)
+
+    except Exception as e:
+        log.error("Failed saving file", file=filename, error=str(e))
+        return None
+
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_documents(
+    paths: Iterable[Path],
+    *,
+    workers: int = 1,
+    pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+) -> List[Document]:
+    """
+    Load documents using the appropriate LangChain loader.
 
-           
-            try:
-                stream.seek(0)
-            except Exception:
-                pass
+    With ``workers > 1`` files are parsed in a process pool, and large PDFs
+    are further split into page ranges so one big file does not serialise
+    the whole batch. Output order always matches the input order.
+    """
+    valid_paths = [path for path in paths if _is_loadable(path)]
+
+    loaded = {
+        item.path: item.documents
+        for item in iter_documents(valid_paths, workers=workers, pages_per_task=pages_per_task)
+    }
+    documents = [doc for path in valid_paths for doc in loaded.get(path, [])]
+
+    log.info("Documents loaded", count=len(documents))
+    return documents
 
-            data = stream.read()
-            if not data:
-                log.error("Empty file input, skipping", file=filename)
-                continue
 
-            with open(out_path, "wb") as f:
-                f.write(data)
+def _is_loadable(path: Path) -> bool:
+    try:
+        if not path.exists():
+            log.warning("File does not exist", path=str(path))
+            return False
 
-            saved.append(out_path)
-            log.info("File saved", file=filename, size=len(data))
+        if path.stat().st_size == 0:
+            log.error("Skipping empty file", path=str(path))
+            return False
 
-        except Exception as e:
-            log.error("Failed saving file", file=filename, error=str(e))
+        if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            log.warning("Unsupported extension skipped", path=str(path))
+            return False
 
-    return saved
+        return True
 
+    except Exception as e:
+        log.error("Failed loading document", path=str(path), error=str(e))
+        return False
 
-def load_documents(paths: Iterable[Path]) -> List[Document]:
+
+def iter_documents(
+    paths: Iterable[Path],
+    *,
+    workers: int = 1,
+    pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+) -> Iterator[LoadedFile]:
     """
-    Load documents using the appropriate LangChain loader.
+    Yield each file as soon as it has been parsed, in completion order.
+
+    Failures are reported per file instead of raised. In the parallel path
+    at most ``2 * workers`` page-range tasks are in flight, so a slow
+    consumer holds back parsing rather than buffering the whole batch.
     """
-    documents: List[Document] = []
+    paths = list(paths)
+    if workers > 1 and paths:
+        yield from _iter_documents_parallel(paths, workers, pages_per_task)
+        return
 
     for path in paths:
+        if not _is_loadable(path):
+            yield LoadedFile(path, [], "missing, empty or unsupported file")
+            continue
         try:
-            if not path.exists():
-                log.warning("File does not exist", path=str(path))
-                continue
+            yield _loaded(path, _get_loader(path).load())
+        except Exception as e:
+            log.error("Failed loading document", path=str(path), error=str(e))
+            yield LoadedFile(path, [], str(e))
 
-            if path.stat().st_size == 0:
-                log.error("Skipping empty file", path=str(path))
-                continue
 
-            ext = path.suffix.lower()
-            if ext not in SUPPORTED_EXTENSIONS:
-                log.warning("Unsupported extension skipped", path=str(path))
-                continue
+def iter_pages(
+    paths: Iterable[Path],
+    on_error: Optional[Callable[[Path, str], None]] = None,
+) -> Iterator[Document]:
+    """
+    Yield documents one page (or row) at a time via the loaders' ``lazy_load``.
 
-            loader = _get_loader(path)
-            docs = loader.load()
+    Memory stays bounded by a single page regardless of file size. A file
+    that fails part-way may already have yielded pages; ``on_error`` lets
+    the caller discard them.
+    """
+    for path in paths:
+        if not _is_loadable(path):
+            if on_error:
+                on_error(path, "missing, empty or unsupported file")
+            continue
+        try:
+            for doc in _get_loader(path).lazy_load():
+                yield doc
+        except Exception as e:
+            log.error("Failed loading document", path=str(path), error=str(e))
+            if on_error:
+                on_error(path, str(e))
+
+
+def _loaded(path: Path, docs: List[Document]) -> LoadedFile:
+    if not docs:
+        log.warning("No documents extracted", path=str(path))
+        return LoadedFile(path, [], "no text extracted")
+    return LoadedFile(path, docs)
+
+
+def _iter_documents_parallel(
+    paths: List[Path],
+    workers: int,
+    pages_per_task: int,
+) -> Iterator[LoadedFile]:
+    tasks = [(path, page_range) for path in paths for page_range in _page_ranges(path, pages_per_task)]
+    remaining = Counter(path for path, _ in tasks)
+    parts: Dict[Path, list] = {}
+    errors: Dict[Path, str] = {}
+    queued = iter(tasks)
+
+    # Not fork: the parent already runs the log writer and other threads, and
+    # a forked child would inherit their locks mid-use.
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=configure_worker_logging,
+        initargs=(worker_logging_settings(),),
+    ) as pool:
+        in_flight = {}
+
+        def refill() -> None:
+            for path, page_range in islice(queued, max(0, 2 * workers - len(in_flight))):
+                in_flight[pool.submit(_load_task, str(path), page_range)] = (path, page_range)
+
+        refill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, page_range = in_flight.pop(future)
+                try:
+                    parts.setdefault(path, []).append((page_range, future.result()))
+                except Exception as e:
+                    if path not in errors:
+                        log.error("Failed loading document", path=str(path), error=str(e))
+                    errors[path] = str(e)
+
+                remaining[path] -= 1
+                if remaining[path]:
+                    continue
+
+                file_parts = sorted(parts.pop(path, []), key=lambda item: item[0] or (0, 0))
+                if path in errors:
+                    yield LoadedFile(path, [], errors.pop(path))
+                else:
+                    yield _loaded(path, [doc for _, part in file_parts for doc in part])
+            refill()
+
+    log.info("Parallel document load finished", files=len(paths), tasks=len(tasks), workers=workers)
+
+
+def _page_ranges(path: Path, pages_per_task: int) -> List[Optional[Tuple[int, int]]]:
+    """Split a PDF into ``[start, stop)`` page ranges; other files load whole."""
+    if path.suffix.lower() != ".pdf" or pages_per_task <= 0:
+        return [None]
+
+    try:
+        from pypdf import PdfReader
+        total = len(PdfReader(str(path)).pages)
+    except Exception:
+        return [None]
+
+    if total <= pages_per_task:
+        return [None]
+
+    return [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+
+
+def _load_task(path: str, page_range: Optional[Tuple[int, int]]) -> List[Document]:
+    """Process-pool entry point; raises so the parent can isolate the file."""
+    if page_range is None:
+        return _get_loader(Path(path)).load()
+    return _load_pdf_pages(path, *page_range)
+
+
+def _load_pdf_pages(path: str, start: int, stop: int) -> List[Document]:
+    """Extract a page range with the same text and metadata as PyPDFLoader."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    # Same merge as PyPDFParser: defaults, then the PDF's document info
+    # (producer, creator, creationdate, ...).
+    doc_metadata = _normalize_pdf_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": path, "total_pages": len(reader.pages)}
+    )
+    docs: List[Document] = []
+
+    for page_number in range(start, stop):
+        page = reader.pages[page_number]
+        docs.append(
+            Document(
+                page_content=(page.extract_text() or "").strip(),
+                metadata=doc_metadata | {
+                    "page": page_number,
+                    "page_label": reader.page_labels[page_number],
+                },
+            )
+        )
 
-            if not docs:
-                log.warning("No documents extracted", path=str(path))
-                continue
+    return docs
 
-            documents.extend(docs)
 
-        except Exception as e:
-            log.error(
-                "Failed loading document",
-                path=str(path),
-                error=str(e),
-            )
 
-    log.info("Documents loaded", count=len(documents))
-    return documents
+def _normalize_pdf_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Local copy of PyPDFParser's metadata clean-up (a private langchain helper).
 
+    Keys lose their leading "/" and are lower-cased, PDF dates become ISO
+    8601, other values are stringified and stripped; ``page_count`` and
+    ``file_path`` are also stored as ``total_pages`` and ``source``.
+    ``test.py`` checks the result against PyPDFLoader.
+    """
+    aliases = {"page_count": "total_pages", "file_path": "source"}
+    normalized: Dict[str, Any] = {}
+    for key, value in metadata.items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key[1:].lower() if key.startswith("/") else key.lower()
+        if key in ("creationdate", "moddate"):
+            try:
+                normalized[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                normalized[key] = value
+        elif key in aliases:
+            normalized[aliases[key]] = value
+            normalized[key] = value
+        elif isinstance(value, str):
+            normalized[key] = value.strip()
+        else:
+            normalized[key] = value
+    return normalized
 
 
 def _get_loader(path: Path):
     """Return correct LangChain loader for a file."""
+    # Imported here: langchain_community.document_loaders is slow to import.
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        TextLoader,
+        Docx2txtLoader,
+        CSVLoader,
+    )
+
     ext = path.suffix.lower()
 
     if ext == ".pdf":
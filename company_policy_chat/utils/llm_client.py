@@ -0,0 +1,341 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+log = logging.getLogger(__name__)
+
+# Status codes worth another attempt: timeouts, conflicts, throttling and 5xx.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def retry_decision(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    """(retryable, server-requested delay in seconds) for a provider error."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+
+    retry_after = None
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after") is not None:
+            retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+
+    if status is not None:
+        return status in RETRYABLE_STATUS, retry_after
+
+    name = type(exc).__name__
+    return ("Timeout" in name or "Connection" in name), retry_after
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. ``reserve`` takes tokens immediately (the
+    balance may go negative) and returns how long the caller must wait, so
+    concurrent callers queue up fairly instead of polling.
+    """
+
+    def __init__(self, rate_per_s: float, capacity: Optional[float] = None):
+        self.rate = rate_per_s
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_s)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Chat model wrapper that owns concurrency, rate limits and retries.
+
+    Every provider call takes a slot from a process-wide semaphore and
+    reserves capacity from request (and optionally token) buckets. Throttled
+    or transient failures are retried with full-jitter exponential backoff,
+    honouring ``Retry-After``. With ``hedge_after_s`` set, a non-streaming
+    call still running after that long is duplicated once and the first
+    success wins. Streams are retried only before their first chunk.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseChatModel
+    max_concurrency: int = 8
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    chars_per_token: float = 4.0
+    max_retries: int = 4
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 20.0
+    hedge_after_s: Optional[float] = None
+
+    _semaphore: threading.BoundedSemaphore = PrivateAttr(default=None)
+    _request_bucket: Optional[TokenBucket] = PrivateAttr(default=None)
+    _token_bucket: Optional[TokenBucket] = PrivateAttr(default=None)
+    _executor: ThreadPoolExecutor = PrivateAttr(default=None)
+    _slot_waiters: ThreadPoolExecutor = PrivateAttr(default=None)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _stats_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        # Both buckets hold a minute's budget, so the rewrite -> answer calls of
+        # one query (and a few users at once) go out back to back; the rate
+        # only bites on sustained load.
+        if self.requests_per_minute:
+            self._request_bucket = TokenBucket(self.requests_per_minute / 60, capacity=self.requests_per_minute)
+        if self.tokens_per_minute:
+            self._token_bucket = TokenBucket(self.tokens_per_minute / 60, capacity=self.tokens_per_minute)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(2, 2 * self.max_concurrency),
+            thread_name_prefix="llm-hedge",
+        )
+        self._slot_waiters = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-slot")
+        self._stats = {
+            "calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "hedges": 0, "hedge_wins": 0, "failures": 0,
+            "admission_wait_ms": 0,
+        }
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"inner": self.inner._identifying_params, "max_concurrency": self.max_concurrency}
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    # ----- admission -------------------------------------------------------
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> float:
+        return sum(len(str(m.content)) for m in messages) / self.chars_per_token
+
+    def _admission_delay(self, messages: List[BaseMessage]) -> float:
+        delay = 0.0
+        if self._request_bucket is not None:
+            delay = max(delay, self._request_bucket.reserve(1))
+        if self._token_bucket is not None:
+            delay = max(delay, self._token_bucket.reserve(self._estimate_tokens(messages)))
+        if delay:
+            self._count("admission_wait_ms", round(delay * 1000))
+        return delay
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def _on_failure(self, exc: BaseException, attempt: int) -> float:
+        """Delay before the next attempt, or re-raise when the error is final."""
+        retryable, retry_after = retry_decision(exc)
+        if getattr(exc, "status_code", None) == 429 or "RateLimit" in type(exc).__name__:
+            self._count("throttled")
+        if not retryable or attempt >= self.max_retries:
+            self._count("failures")
+            raise exc
+
+        delay = self._backoff(attempt, retry_after)
+        self._count("retries")
+        log.warning(f"LLM call failed ({type(exc).__name__}), retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    async def _acquire_slot(self) -> None:
+        # threading semaphore so sync and async callers share one limit; when it
+        # is full, a waiter thread blocks on it instead of the event loop polling.
+        if self._semaphore.acquire(blocking=False):
+            return
+        waiter = asyncio.get_running_loop().run_in_executor(self._slot_waiters, self._semaphore.acquire)
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The waiter still takes the slot; hand it straight back.
+            waiter.add_done_callback(lambda _: self._semaphore.release())
+            raise
+
+    # ----- sync ------------------------------------------------------------
+
+    def _call_with_retry(self, fn: Callable[[], Any], messages: List[BaseMessage]) -> Any:
+        attempt = 0
+        while True:
+            time.sleep(self._admission_delay(messages))
+            with self._semaphore:
+                self._count("attempts")
+                try:
+                    return fn()
+                except Exception as exc:
+                    delay = self._on_failure(exc, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def _hedged(self, fn: Callable[[], Any], messages: List[BaseMessage]) -> Any:
+        if self.hedge_after_s is None:
+            return self._call_with_retry(fn, messages)
+
+        primary = self._executor.submit(self._call_with_retry, fn, messages)
+        done, _ = wait([primary], timeout=self.hedge_after_s)
+        if done:
+            return primary.result()
+
+        self._count("hedges")
+        backup = self._executor.submit(self._call_with_retry, fn, messages)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    # The loser keeps running in the pool; its result is dropped.
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._count("calls")
+        return self._hedged(
+            lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            messages,
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._count("calls")
+        attempt = 0
+        while True:
+            time.sleep(self._admission_delay(messages))
+            started = False
+            with self._semaphore:
+                self._count("attempts")
+                try:
+                    for chunk in self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                        started = True
+                        yield chunk
+                    return
+                except Exception as exc:
+                    if started:
+                        raise
+                    delay = self._on_failure(exc, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    # ----- async -----------------------------------------------------------
+
+    async def _acall_with_retry(self, factory: Callable[[], Any], messages: List[BaseMessage]) -> Any:
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admission_delay(messages))
+            await self._acquire_slot()
+            try:
+                self._count("attempts")
+                return await factory()
+            except Exception as exc:
+                delay = self._on_failure(exc, attempt)
+            finally:
+                self._semaphore.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _ahedged(self, factory: Callable[[], Any], messages: List[BaseMessage]) -> Any:
+        if self.hedge_after_s is None:
+            return await self._acall_with_retry(factory, messages)
+
+        primary = asyncio.ensure_future(self._acall_with_retry(factory, messages))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after_s)
+        if done:
+            return primary.result()
+
+        self._count("hedges")
+        backup = asyncio.ensure_future(self._acall_with_retry(factory, messages))
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._count("calls")
+        return await self._ahedged(
+            lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            messages,
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self._count("calls")
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admission_delay(messages))
+            await self._acquire_slot()
+            started = False
+            try:
+                self._count("attempts")
+                async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                if started:
+                    raise
+                delay = self._on_failure(exc, attempt)
+            finally:
+                self._semaphore.release()
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,219 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from company_policy_chat.logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+# Millisecond buckets covering in-memory work through slow LLM round trips.
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound containing the q-th observation (Prometheus-style estimate)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Thread-safe counters and histograms with JSON and Prometheus text export."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    def dump(self) -> Dict:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": round(hist.total, 3),
+                        "p50": hist.quantile(0.5),
+                        "p90": hist.quantile(0.9),
+                        "p99": hist.quantile(0.99),
+                    }
+                    for key, hist in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.dump(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def fmt(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+
+            for name, series in self._histograms.items():
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{fmt(key, (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{fmt(key)} {hist.total}")
+                    lines.append(f"{name}_count{fmt(key)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+@contextmanager
+def span(stage: str, **fields) -> Iterator[Dict]:
+    """
+    Time a block, emit a ``stage_timing`` structlog event and record it in
+    the ``stage_duration_ms`` histogram. The yielded dict can be filled with
+    extra fields (counts, sizes) that are logged alongside the timing.
+    """
+    extra: Dict = dict(fields)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield extra
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _metrics.observe("stage_duration_ms", elapsed_ms, {"stage": stage})
+        if status == "error":
+            _metrics.inc("stage_errors_total", labels={"stage": stage})
+        log.info("stage_timing", stage=stage, duration_ms=round(elapsed_ms, 3), status=status, **extra)
+
+
+def start_metrics_server(port: int = 9464, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a daemon thread."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = _metrics.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = json.dumps(_metrics.dump()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    log.info("Metrics server started", host=host, port=port)
+    return server
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Wraps an embedder so every call is timed as an ``embed_*`` stage."""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embed_documents", texts=len(texts)):
+            vectors = self.inner.embed_documents(texts)
+        _metrics.inc("embeddings_total", len(texts), {"kind": "document"})
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embed_query"):
+            vector = self.inner.embed_query(text)
+        _metrics.inc("embeddings_total", 1, {"kind": "query"})
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        batched = getattr(self.inner, "embed_queries", None)
+        with span("embed_queries", texts=len(texts)):
+            vectors = batched(texts) if batched else [self.inner.embed_query(text) for text in texts]
+        _metrics.inc("embeddings_total", len(texts), {"kind": "query"})
+        return vectors
+
+    def __getattr__(self, name):
+        # Expose wrapped extras such as CachedEmbeddings.stats().
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
@@ -2,7 +2,6 @@ import os
 import logging
 from typing import Dict, Optional
 from dotenv import load_dotenv
-from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 from company_policy_chat.utils.config_loader import load_config
 
 log = logging.getLogger(__name__)
@@ -38,11 +37,37 @@ class ModelLoader:
         try:
             model_name = self.config["embedding_model"]["model_name"]
             log.info(f"Loading embedding model: {model_name}")
-            return FastEmbedEmbeddings(model=model_name)
+            from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+            embeddings = FastEmbedEmbeddings(model=model_name)
+
+            cache_cfg = self.config.get("embedding_cache", {})
+            if cache_cfg.get("enabled", False):
+                log.info(f"Embedding cache enabled at {cache_cfg.get('path')}")
+                from company_policy_chat.utils.embedding_cache import CachedEmbeddings
+                return CachedEmbeddings(
+                    embeddings,
+                    model_name=model_name,
+                    cache_path=cache_cfg.get("path", ".cache/embeddings.sqlite"),
+                    max_entries=cache_cfg.get("max_entries", 200_000),
+                    touch_interval_s=cache_cfg.get("touch_interval_s", 600),
+                )
+
+            return embeddings
         except Exception as e:
             log.error(f"Failed to load embedding model: {e}")
             raise
 
+    def load_reranker(self):
+        try:
+            rerank_cfg = self.config.get("reranker", {})
+            model_name = rerank_cfg.get("model_name", "Xenova/ms-marco-MiniLM-L-6-v2")
+            log.info(f"Loading cross-encoder reranker: {model_name}")
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+            return TextCrossEncoder(model_name=model_name, threads=rerank_cfg.get("threads"))
+        except Exception as e:
+            log.error(f"Failed to load reranker model: {e}")
+            raise
+
     def load_llm(self):
         llm_cfg = self.config.get("llm", {})
         provider = llm_cfg.get("provider", "groq")
@@ -53,23 +78,65 @@ class ModelLoader:
 
         log.info(f"Initializing LLM: {provider} | Model: {model_name}")
 
+        client_cfg = self.config.get("llm_client", {})
+        wrapped = client_cfg.get("enabled", False)
+
         if provider == "groq":
-            return self._init_groq(model_name, temp)
-        
-        raise ValueError(f"Unsupported provider: {provider}")
+            llm = self._init_groq(
+                model_name,
+                temp,
+                base_url=spec.get("base_url"),
+                timeout=client_cfg.get("timeout_s"),
+                # The wrapper owns retries; letting the SDK retry too multiplies attempts.
+                max_retries=0 if wrapped else 2,
+            )
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
 
-    def _init_groq(self, model: str, temperature: float):
+        return self._wrap_llm(llm, client_cfg) if wrapped else llm
+
+    def _init_groq(
+        self,
+        model: str,
+        temperature: float,
+        *,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: int = 2,
+    ):
         try:
             from langchain_groq import ChatGroq
             return ChatGroq(
                 model=model,
                 temperature=temperature,
-                api_key=self.api_keys.get("GROQ_API_KEY")
+                api_key=self.api_keys.get("GROQ_API_KEY"),
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=max_retries,
             )
         except ImportError:
             log.error("langchain-groq package not found.")
             raise
 
+    @staticmethod
+    def _wrap_llm(llm, client_cfg: Dict):
+        from company_policy_chat.utils.llm_client import ResilientChatModel
+
+        log.info(
+            f"LLM client: concurrency={client_cfg.get('max_concurrency', 8)} "
+            f"rpm={client_cfg.get('requests_per_minute')} hedge_after_s={client_cfg.get('hedge_after_s')}"
+        )
+        return ResilientChatModel(
+            inner=llm,
+            max_concurrency=client_cfg.get("max_concurrency", 8),
+            requests_per_minute=client_cfg.get("requests_per_minute"),
+            tokens_per_minute=client_cfg.get("tokens_per_minute"),
+            max_retries=client_cfg.get("max_retries", 4),
+            backoff_base_s=client_cfg.get("backoff_base_s", 0.5),
+            backoff_max_s=client_cfg.get("backoff_max_s", 20.0),
+            hedge_after_s=client_cfg.get("hedge_after_s"),
+        )
+
 if __name__ == "__main__":
 
     loader = ModelLoader()
@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from company_policy_chat.src.document_ingestion import snapshots
+from company_policy_chat.utils.embedding_cache import CachedEmbeddings
+from company_policy_chat.utils.metrics import InstrumentedEmbeddings
+from company_policy_chat.utils.model_loader import ModelLoader
+
+log = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe holder for expensive shared objects.
+
+    The model loader, embedder, LLM client and each FAISS store are created
+    once per process and reused by every Ingestion / Retrieval instance.
+    Vector stores are keyed by directory and index name and remember the
+    snapshot they were loaded from, so a newly published snapshot is loaded
+    on the next request instead of serving a stale copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._model_loader: Optional[ModelLoader] = None
+        self._embeddings = None
+        self._llm = None
+        self._reranker = None
+        self._vectorstores: Dict[Tuple[str, str], Tuple[str, Path, object]] = {}
+
+    def get_model_loader(self) -> ModelLoader:
+        if self._model_loader is None:
+            with self._lock:
+                if self._model_loader is None:
+                    self._model_loader = ModelLoader()
+        return self._model_loader
+
+    def get_embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = InstrumentedEmbeddings(self.get_model_loader().load_embedding())
+        return self._embeddings
+
+    def get_llm(self):
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = self.get_model_loader().load_llm()
+        return self._llm
+
+    def get_reranker(self):
+        if self._reranker is None:
+            with self._lock:
+                if self._reranker is None:
+                    self._reranker = self.get_model_loader().load_reranker()
+        return self._reranker
+
+    @staticmethod
+    def _fingerprint(folder: Path, index_name: str) -> str:
+        stat = os.stat(folder / f"{index_name}.faiss")
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    @staticmethod
+    def index_version(index_path: str, index_name: str = "index") -> str:
+        """Published snapshot name, or an mtime fingerprint for the legacy flat layout."""
+        version = snapshots.current_version(index_path)
+        return version if version is not None else ModelRegistry._fingerprint(Path(index_path), index_name)
+
+    def get_vectorstore(self, index_path: str, index_name: str = "index"):
+        return self.get_snapshot(index_path, index_name)[2]
+
+    def get_snapshot(self, index_path: str, index_name: str = "index") -> Tuple[str, Path, Any]:
+        """
+        (version, directory, store) for ``index_path`` from one lookup, so
+        files read next to the store come from the snapshot it was loaded from.
+        """
+        return self._vectorstore_entry(index_path, index_name)
+
+    def _vectorstore_entry(self, index_path: str, index_name: str):
+        from langchain_community.vectorstores import FAISS
+        from company_policy_chat.src.document_ingestion import disk_store, index_factory
+
+        root = Path(index_path).resolve()
+        key = (str(root), index_name)
+
+        cached = self._vectorstores.get(key)
+        snapshot, folder = snapshots.locate(root)
+        version = snapshot if snapshot is not None else self._fingerprint(folder, index_name)
+        if cached and cached[0] == version:
+            return cached
+
+        with self._lock:
+            cached = self._vectorstores.get(key)
+            if cached and cached[0] == version:
+                return cached
+
+            log.info(f"Loading FAISS store into registry: {folder} ({index_name}, version {version})")
+            if disk_store.has_disk_store(folder, index_name):
+                vectorstore = disk_store.load_disk_store(folder, self.get_embeddings(), index_name, mmap=True)
+            else:
+                # Legacy pickle layout written before the disk store existed.
+                vectorstore = FAISS.load_local(
+                    folder_path=str(folder),
+                    embeddings=self.get_embeddings(),
+                    index_name=index_name,
+                    allow_dangerous_deserialization=True,
+                )
+            index_factory.apply_search_params(
+                vectorstore.index,
+                self.get_model_loader().config.get("vector_index", {}),
+            )
+            entry = (version, folder, vectorstore)
+            self._vectorstores[key] = entry
+
+        if cached:
+            self._release(cached)
+        return entry
+
+    def invalidate_vectorstore(self, index_path: str, index_name: str = "index") -> None:
+        with self._lock:
+            cached = self._vectorstores.pop((str(Path(index_path).resolve()), index_name), None)
+        if cached:
+            self._release(cached)
+
+    @staticmethod
+    def _release(entry) -> None:
+        """
+        Drop a replaced store. Only idle SQLite handles are closed here; ones
+        other threads may be reading through close when the last Retrieval
+        still holding the store swaps to the new one.
+        """
+        from company_policy_chat.src.document_ingestion import disk_store
+
+        version, folder, vectorstore = entry
+        disk_store.close_disk_store(vectorstore)
+        log.info(f"Released FAISS store: {folder} (version {version})")
+
+    def warm_up(self, index_path: Optional[str] = None, index_name: str = "index") -> None:
+        """Load every shared model up front so the first query pays no load latency."""
+        # One real embedding call lets onnxruntime allocate its buffers up front;
+        # it must reach the model itself, a cache hit would skip the allocation.
+        self._embedding_model(self.get_embeddings()).embed_query("warm up")
+        self.get_llm()
+
+        if index_path:
+            self.get_vectorstore(index_path, index_name)
+
+        log.info("Model registry warmed up")
+
+    @staticmethod
+    def _embedding_model(embeddings):
+        """The embedding model itself, behind the metrics and cache wrappers."""
+        while True:
+            if isinstance(embeddings, InstrumentedEmbeddings):
+                embeddings = embeddings.inner
+            elif isinstance(embeddings, CachedEmbeddings):
+                embeddings = embeddings.embedder
+            else:
+                return embeddings
+
+    def override(self, *, embeddings=None, llm=None, reranker=None) -> None:
+        """Install pre-built models, e.g. offline fakes for benchmarks."""
+        with self._lock:
+            if embeddings is not None:
+                self._embeddings = InstrumentedEmbeddings(embeddings)
+            if llm is not None:
+                self._llm = llm
+            if reranker is not None:
+                self._reranker = reranker
+            self._vectorstores.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._model_loader = None
+            self._embeddings = None
+            self._llm = None
+            self._reranker = None
+            self._vectorstores.clear()
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    return _registry
@@ -1,11 +1,17 @@
+import io
+import re
 import sys
+import tempfile
 import traceback
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, AIMessage
 
+from company_policy_chat.logger.custom_logger import worker_logging_settings
+from company_policy_chat.src.document_ingestion import snapshots
 from company_policy_chat.src.document_ingestion.ingestion import Ingestion
 from company_policy_chat.src.document_retrieval.retrieval import Retrieval
+from company_policy_chat.utils.file_utils import _load_pdf_pages, iter_documents
 
 load_dotenv()
 
@@ -13,9 +19,7 @@ load_dotenv()
 def test_ingestion_and_retrieval():
     try:
         
-        test_assets_dir = Path(
-            "/home/deblina/Documents/projects/neura dynamics assignment/test_assets"
-        )
+        test_assets_dir = Path(__file__).resolve().parent / "test_assets"
         uploaded_files = []
 
         for file_path in test_assets_dir.glob("*"):  
@@ -51,7 +55,7 @@ def test_ingestion_and_retrieval():
 
         
         faiss_dir = Path("faiss_index")
-        index_file = faiss_dir / "index.faiss"
+        index_file = snapshots.resolve(faiss_dir) / "index.faiss"
 
         if not index_file.exists():
             print(" FAISS index missing")
@@ -106,5 +110,51 @@ def test_ingestion_and_retrieval():
             f.close()
 
 
+def test_parallel_loader_worker_logs():
+    # A startxref pointer a few bytes off makes pypdf log a warning each time
+    # the file is opened: once in the parent to count pages, once per task.
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    pages = 4
+    for _ in range(pages):
+        writer.add_blank_page(200, 200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    data = re.sub(rb"(startxref\s+)(\d+)", lambda m: m.group(1) + str(int(m.group(2)) + 3).encode(), buffer.getvalue())
+
+    log_path = Path(worker_logging_settings()["path"])
+    before = log_path.read_bytes() if log_path.exists() else b""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp) / "bad_xref.pdf"
+        pdf.write_bytes(data)
+        loaded = list(iter_documents([pdf], workers=2, pages_per_task=1))
+
+    assert len(loaded) == 1
+    written = log_path.read_bytes()[len(before):].decode("utf-8")
+    warnings = written.count("incorrect startxref pointer")
+    # The parent's own warning may still be queued; the workers' must be there.
+    assert warnings >= pages, f"expected >= {pages} worker warnings in {log_path}, found {warnings}"
+    print(f"Worker warnings logged: {warnings}")
+
+
+def test_pdf_page_ranges_match_pypdf_loader():
+    # Page-range tasks rebuild PyPDFLoader's output by hand; keep them equal.
+    from langchain_community.document_loaders import PyPDFLoader
+    from pypdf import PdfReader
+
+    for path in Path(__file__).resolve().parent.joinpath("test_assets").glob("*.pdf"):
+        expected = PyPDFLoader(str(path)).load()
+        total = len(PdfReader(str(path)).pages)
+        middle = total // 2
+        loaded = _load_pdf_pages(str(path), 0, middle) + _load_pdf_pages(str(path), middle, total)
+
+        assert [d.page_content for d in loaded] == [d.page_content for d in expected], path.name
+        assert [d.metadata for d in loaded] == [d.metadata for d in expected], path.name
+        print(f"Page ranges match PyPDFLoader: {path.name} ({total} pages)")
+
+
 if __name__ == "__main__":
+    test_pdf_page_ranges_match_pypdf_loader()
+    test_parallel_loader_worker_logs()
     test_ingestion_and_retrieval()